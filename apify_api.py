@@ -0,0 +1,224 @@
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import tracing
+
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+APIFY_BASE_URL = "https://api.apify.com/v2"
+SCRAPER_ACTOR = "apify~instagram-scraper"
+
+FAILED_STATUSES = {"FAILED", "ABORTED", "TIMED-OUT"}
+
+# Apify caps waitForFinish at 60 seconds per request
+MAX_WAIT_FOR_FINISH = 60
+
+# Rate limiting and transient server errors are worth another attempt
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ApifyRunError(RuntimeError):
+    """Raised when an actor run fails, is aborted, times out or misses our deadline"""
+
+    def __init__(self, message, run=None):
+        super().__init__(message)
+        self.run = run or {}
+
+
+def _retry_after_seconds(value):
+    """Parse a Retry-After header given either in seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ApifyClient:
+    """Pooled HTTP client for the Apify endpoints the scraper uses.
+
+    One keep-alive Session is shared by every call (and every thread), so
+    status polls and dataset pages reuse connections instead of paying a new
+    TLS handshake each time. Requests have connect/read timeouts, and 429/5xx
+    responses are retried with exponential backoff that honours Retry-After.
+    Each HTTP attempt is reported to the `hooks` callables as a dict with the
+    method, path, status, elapsed seconds, response bytes and attempt number.
+    """
+
+    def __init__(self, token, base_url=APIFY_BASE_URL, timeout=(10, 60), max_retries=4,
+                 backoff=1.0, max_backoff=60.0, pool_size=16, verify=False, hooks=None):
+        self.token = token
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.verify = verify
+        self.hooks = list(hooks or [])
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self):
+        self.session.close()
+
+    def _emit(self, **info):
+        for hook in self.hooks:
+            hook(info)
+
+    def _backoff(self, attempt, retry_after=None):
+        delay = _retry_after_seconds(retry_after)
+        if delay is None:
+            delay = random.uniform(0, self.backoff * 2 ** attempt)
+        time.sleep(min(delay, self.max_backoff))
+
+    def request(self, method, path, params=None, json=None, timeout=None,
+                retry_statuses=RETRY_STATUSES, retry_errors=True):
+        """Send a request with retries and return the successful response"""
+        url = f"{self.base_url}{path}"
+        params = {"token": self.token, **(params or {})}
+
+        for attempt in range(self.max_retries + 1):
+            started = time.monotonic()
+            try:
+                response = self.session.request(
+                    method, url, params=params, json=json,
+                    timeout=timeout or self.timeout, verify=self.verify
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._emit(method=method, path=path, status=None, elapsed=time.monotonic() - started,
+                           bytes=0, attempt=attempt, error=e.__class__.__name__)
+                if not retry_errors or attempt == self.max_retries:
+                    raise
+                self._backoff(attempt)
+                continue
+
+            self._emit(method=method, path=path, status=response.status_code,
+                       elapsed=time.monotonic() - started, bytes=len(response.content),
+                       attempt=attempt, error=None)
+            if response.status_code in retry_statuses and attempt < self.max_retries:
+                self._backoff(attempt, response.headers.get("Retry-After"))
+                continue
+            response.raise_for_status()
+            return response
+
+    def start_run(self, payload, wait_for_finish=0):
+        """Start a scraper run and return its run object.
+
+        With `wait_for_finish` the request is held open for up to that many
+        seconds, so short runs come back already finished. Only 429s are
+        retried here; retrying a 5xx could start a duplicate run.
+        """
+        params = {}
+        if wait_for_finish:
+            params["waitForFinish"] = min(int(wait_for_finish), MAX_WAIT_FOR_FINISH)
+        response = self.request(
+            "POST", f"/acts/{SCRAPER_ACTOR}/runs", params=params, json=payload,
+            timeout=(self.timeout[0], params.get("waitForFinish", 0) + 30),
+            retry_statuses={429}, retry_errors=False,
+        )
+        return response.json()["data"]
+
+    def wait_for_run(self, run, deadline=900, wait_for_finish=MAX_WAIT_FOR_FINISH,
+                     initial_delay=1.0, max_delay=30.0):
+        """Block until a run succeeds and return its final run object.
+
+        Each status request long-polls with `waitForFinish`, so Apify answers as
+        soon as the run ends. If the server returns early without a terminal
+        status we back off exponentially (full jitter) before asking again.
+        Raises ApifyRunError on FAILED/ABORTED/TIMED-OUT or once `deadline`
+        seconds have passed.
+        """
+        run_id = run["id"]
+        end = time.monotonic() + deadline
+        delay = initial_delay
+
+        while True:
+            status = run.get("status")
+            if status == "SUCCEEDED":
+                return run
+            if status in FAILED_STATUSES:
+                raise ApifyRunError(f"Apify run {run_id} finished with status {status}", run)
+
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                raise ApifyRunError(f"Apify run {run_id} did not finish within {deadline}s", run)
+
+            wait = int(min(wait_for_finish, MAX_WAIT_FOR_FINISH, remaining))
+            params = {"waitForFinish": wait} if wait > 0 else {}
+            started = time.monotonic()
+            response = self.request(
+                "GET", f"/actor-runs/{run_id}", params=params,
+                timeout=(self.timeout[0], wait + 30),
+            )
+            run = response.json()["data"]
+
+            if run.get("status") in FAILED_STATUSES or run.get("status") == "SUCCEEDED":
+                continue
+
+            # Only sleep when the long poll came back early; a full wait already paced us
+            if wait == 0 or time.monotonic() - started < wait:
+                remaining = end - time.monotonic()
+                time.sleep(max(0.0, min(random.uniform(0, delay), remaining)))
+                delay = min(delay * 2, max_delay)
+
+    def iter_dataset_items(self, dataset_id, page_size=20):
+        """Yield dataset items one page at a time using offset/limit pagination.
+
+        Only a single page is held in memory, so callers can process items while
+        later pages are still being downloaded.
+        """
+        offset = 0
+        while True:
+            response = self.request(
+                "GET", f"/datasets/{dataset_id}/items", params={"offset": offset, "limit": page_size}
+            )
+            page = _json.loads(response.content)
+
+            yield from page
+
+            total = response.headers.get("X-Apify-Pagination-Total")
+            offset += len(page)
+            if len(page) < page_size or (total is not None and offset >= int(total)):
+                return
+
+    def scrape_items(self, payload, deadline=900, page_size=20):
+        """Start an Apify scraper run, wait for it and stream its dataset items"""
+        with tracing.span("apify.start_run"):
+            run = self.start_run(payload, wait_for_finish=MAX_WAIT_FOR_FINISH)
+            tracing.set_attributes(run_id=run.get("id"), status=run.get("status"))
+        with tracing.span("apify.wait_for_run"):
+            run = self.wait_for_run(run, deadline=deadline)
+            tracing.set_attributes(run_id=run.get("id"), status=run.get("status"))
+        return self.iter_dataset_items(run["defaultDatasetId"], page_size=page_size)
+
+
+def client_from_env(token, hooks=None):
+    """Build an ApifyClient configured from APIFY_* environment variables.
+
+    HTTP attempts are always reported to the current trace span (see tracing.record_http).
+    """
+    return ApifyClient(
+        token,
+        base_url=os.getenv("APIFY_BASE_URL", APIFY_BASE_URL),
+        timeout=(float(os.getenv("APIFY_CONNECT_TIMEOUT", 10)), float(os.getenv("APIFY_READ_TIMEOUT", 60))),
+        max_retries=int(os.getenv("APIFY_MAX_RETRIES", 4)),
+        pool_size=int(os.getenv("APIFY_POOL_SIZE", 16)),
+        verify=os.getenv("APIFY_VERIFY_SSL", "0").lower() in ("1", "true", "yes"),
+        hooks=[tracing.record_http, *(hooks or [])],
+    )
@@ -1,27 +1,38 @@
 import streamlit as st
-import requests
-import time
-from langchain_openai import AzureChatOpenAI
 from dotenv import load_dotenv
 import os
+import io
+import time
 from wordcloud import WordCloud
-import matplotlib.pyplot as plt
 import pandas as pd
 import plotly.express as px
-import json
-from langchain_google_genai import ChatGoogleGenerativeAI
-from collections import Counter
+from pipeline import (
+    get_apify_client, get_llm_cache, get_model, get_scrape_cache, get_trend_store,
+    insight_options_from_env, run_analysis_job, run_refilter_job, scrape_options_from_env,
+)
+from batch import parse_terms, run_batch_job
+from jobs import JobQueue
+from extraction import normalize_hashtag
+import tracing
 
 # Load environment variables
 load_dotenv()
-subscription_key = st.secrets["SUBSCRIPTION_KEY"]
-API_TOKEN = st.secrets["API_TOKEN"]
-endpoint = st.secrets["AZURE_ENDPOINT"]
-api_version = st.secrets["AZURE_API_VERSION"]
-deployment = st.secrets["AZURE_DEPLOYMENT_NAME"]
-
-# Initialize model
-model = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0)
+tracing.configure_logging()
+# Streamlit secrets feed the same API_TOKEN variable the pipeline reads, so the
+# Apify client below is the pipeline's process-wide singleton
+if not os.getenv("API_TOKEN"):
+    os.environ["API_TOKEN"] = st.secrets["API_TOKEN"]
+
+# Apify settings; APIFY_BASE_URL can point at a local fake server for testing
+SCRAPE_OPTIONS = scrape_options_from_env()
+
+# Model, LLM cache, scrape cache and trend store are process-wide singletons
+# shared with the headless entry point (cli.py); identical prompts are
+# answered from the persistent LLM cache
+llm_cache = get_llm_cache()
+model = get_model()
+INSIGHT_OPTIONS = insight_options_from_env()
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 5))
 
 # Streamlit page configuration with Instagram theme
 st.set_page_config(page_title="Instagram Trend Analyzer", page_icon="📸", layout="wide")
@@ -141,187 +152,158 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def find_all_key_values(data, target_key):
-    results = []
-    def recurse(obj):
-        if isinstance(obj, dict):
-            for key, value in obj.items():
-                if key == target_key:
-                    results.append(value)
-                if isinstance(value, (dict, list)):
-                    recurse(value)
-        elif isinstance(obj, list):
-            for item in obj:
-                recurse(item)
-    recurse(data)
-    return results
-
-def extract_posts_with_locations(items):
-    """Extract posts with their corresponding locations"""
-    posts_with_locations = []
-
-    # Process the top-level location data and posts
-    top_posts = find_all_key_values(items, "topPosts")
-
-    # Extract location data from each item
-    for i, item in enumerate(items):
-        # Each item might have a locationName
-        location_name = item.get("locationName", None)
-        
-        # Each item might have a list of top posts
-        if "topPosts" in item and isinstance(item["topPosts"], list):
-            for post in item["topPosts"]:
-                post_data = {
-                    "location": location_name,
-                    "url": post.get("url", ""),
-                    "caption": post.get("caption", ""),
-                    "hashtags": post.get("hashtags", []),
-                    "thumbnail": post.get("cover_artwork_thumbnail_uri", ""),
-                    "likes": post.get("likesCount", 0)
-                }
-                posts_with_locations.append(post_data)
-
-    # If we couldn't extract them properly, just use the raw data
-    if not posts_with_locations and top_posts:
-        # Fall back to plain extraction
-        for post in top_posts:
-            if isinstance(post, dict):
-                posts_with_locations.append({
-                    "location": None,
-                    "url": post.get("url", ""),
-                    "caption": post.get("caption", ""),
-                    "hashtags": post.get("hashtags", []),
-                    "thumbnail": post.get("thumbnailUrl", ""),
-                    "likes": post.get("likesCount", 0)
-                })
-
-    return posts_with_locations
-
-def run_analysis(searched_term, min_likes=0):
-    run_url = f"https://api.apify.com/v2/acts/apify~instagram-scraper/runs?token={API_TOKEN}"
-    payload = {
-        "addParentData": False,
-        "enhanceUserSearchWithFacebookPage": False,
-        "isUserReelFeedURL": False,
-        "isUserTaggedFeedURL": False,
-        "resultsLimit": 200,  # Increased to get more results
-        "resultsType": "details",
-        "search": f"{searched_term}",
-        "searchLimit": 5,  # Increased to get more results
-        "searchType": "hashtag"
-    }
-    response = requests.post(run_url, json=payload, verify=False)
-    run_data = response.json()
-    run_id = run_data["data"]["id"]
-
-    status_url = f"https://api.apify.com/v2/actor-runs/{run_id}?token={API_TOKEN}"
+@st.cache_data(max_entries=64, show_spinner=False)
+def wordcloud_png(hashtag_string):
+    """Render the hashtag word cloud as PNG bytes, once per distinct hashtag string"""
+    wordcloud = WordCloud(width=800, height=400, background_color="white",
+                          colormap="plasma").generate(hashtag_string)
+    buffer = io.BytesIO()
+    wordcloud.to_image().save(buffer, format="PNG")
+    return buffer.getvalue()
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def bar_chart(rows, x, y, color, title):
+    """Build a themed Plotly bar chart spec, cached on its data so reruns skip the rebuild"""
+    # Explicit columns so an empty `rows` still names the axes px.bar looks up
+    fig = px.bar(
+        pd.DataFrame(rows, columns=list(dict.fromkeys([x, y, color]))), 
+        x=x, 
+        y=y,
+        color=color,
+        color_continuous_scale=['#833AB4', '#E1306C', '#F77737', '#FCAF45'],
+        title=title
+    )
+    fig.update_layout(
+        xaxis_tickangle=-45,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig.to_dict()
+
+@st.cache_resource
+def get_job_queue():
+    # Shared by every session so identical in-flight hashtags are only scraped once
+    return JobQueue(max_workers=int(os.getenv("ANALYSIS_WORKERS", 4)))
+
+def submit_analysis(searched_term, min_likes=0):
+    """Queue a background analysis, joining an in-flight job for the same hashtag"""
+    return get_job_queue().submit(
+        normalize_hashtag(searched_term),
+        run_analysis_job,
+        searched_term, get_apify_client(), model,
+        min_likes=min_likes,
+        cache=get_scrape_cache(),
+        scrape_options=SCRAPE_OPTIONS,
+        insight_options=INSIGHT_OPTIONS,
+        store=get_trend_store(),
+        meta={"searched_term": searched_term, "min_likes": min_likes},
+    )
+
+def submit_batch(terms, min_likes=0, insights=False):
+    """Queue a background comparison; identical in-flight comparisons are shared"""
+    key = "batch:" + ",".join(sorted(normalize_hashtag(term) for term in terms)) + f":{min_likes}:{int(insights)}"
+    return get_job_queue().submit(
+        key,
+        run_batch_job,
+        terms, get_apify_client(),
+        min_likes=min_likes,
+        max_concurrency=BATCH_CONCURRENCY,
+        cache=get_scrape_cache(),
+        model=model if insights else None,
+        scrape_options=SCRAPE_OPTIONS,
+        insight_options=INSIGHT_OPTIONS,
+        meta={"terms": terms, "min_likes": min_likes},
+    )
+
+def submit_refilter(result_set, min_likes, insight_cache):
+    """Queue re-filtering a scraped result set and regenerating its insight"""
+    # The job holds the result set, so its id can't be reused while the job is in flight
+    return get_job_queue().submit(
+        f"refilter:{id(result_set)}:{min_likes}",
+        run_refilter_job,
+        result_set, model,
+        min_likes=min_likes,
+        insight_cache=insight_cache,
+        insight_options=INSIGHT_OPTIONS,
+        meta={"searched_term": result_set.searched_term, "min_likes": min_likes},
+    )
+
+INSIGHT_PARTS = {"captions": "📸 Caption analysis", "hashtags": "🏷️ Hashtag analysis", "synthesis": "🔍 Trend report"}
+
+def follow_report(job):
+    """Yield new synthesis text as the background job streams it, until the job ends"""
+    shown = 0
     while True:
-        status_response = requests.get(status_url, verify=False)
-        status_data = status_response.json()
-        status = status_data["data"]["status"]
-        if status in ["SUCCEEDED", "FAILED", "ABORTED", "TIMED-OUT"]:
-            break
-        time.sleep(5)
-
-    default_dataset_id = status_data["data"]["defaultDatasetId"]
-
-    dataset_url = f"https://api.apify.com/v2/datasets/{default_dataset_id}/items?token={API_TOKEN}"
-    dataset_response = requests.get(dataset_url, verify=False)
-    items = dataset_response.json()
-
-    # Extract all available locations
-    all_locations = find_all_key_values(items, "locationName")
-    unique_locations = list(set([loc for loc in all_locations if loc]))
-
-    # Extract posts with their locations
-    posts_with_locations = extract_posts_with_locations(items)
-    
-    # Filter posts by minimum likes
-    posts = [post for post in posts_with_locations if post.get("likes", 0) >= min_likes]
-
-    # If no posts match our filter, fall back to all posts
-    if not posts:
-        posts = posts_with_locations
-
-    # Sort posts by likes count (most likes first)
-    posts = sorted(posts, key=lambda x: x.get("likes", 0), reverse=True)
-
-    # Extract data from filtered posts
-    captions_list = [post.get("caption", "") for post in posts if post.get("caption")]
-    hashtag_lists = [post.get("hashtags", []) for post in posts if post.get("hashtags")]
-    hashtag_list = [tag for sublist in hashtag_lists for tag in sublist]
-    url_list = [post.get("url", "") for post in posts if post.get("url")]
-    thumbnails = [post.get("thumbnail", "") for post in posts if post.get("thumbnail")]
-
-    # Enhanced posts for visualization with thumbnails and URLs
-    post_display_data = []
-    for post in posts:
-        if post.get("url") and post.get("caption"):
-            post_display_data.append({
-                "url": post.get("url", ""),
-                "caption": post.get("caption", ""),
-                "thumbnail": post.get("thumbnail", ""),
-                "location": post.get("location", "Unknown"),
-                "likes": post.get("likes", 0)
-            })
-
-    prompt1 = f'''
-I've collected captions from top-trending Instagram posts related to the keyword: "{searched_term}".
-
-🔍 Please analyze these captions to extract the **underlying trends** in the domain of "{searched_term}". Your goal is not to summarize the captions, but to identify:
-
-* The popular activities, ideas, or content themes people are engaging with
-* What's driving attention and interaction in this space
-* How users are expressing or showcasing "{searched_term}"
-
-🤔 What's trending in the world of "{searched_term}" based on these captions?
-Make the output insightful, engaging, and formatted in en-US English.
-'''
-
-    prompt2 = f'''
-Here is a list of hashtags from top-performing Instagram posts, all related to the keyword: "{searched_term}".
-
-🎯 Analyze these hashtags to identify the **real-world trends** in the domain of "{searched_term}". Focus on:
-
-* Common patterns or subtopics that appear frequently
-* Emerging communities, movements, or events
-* The kind of content these hashtags are attached to
-
-💡 Based on these hashtags, what's trending in the "{searched_term}" space?
-'''
-
-    prompt3 = f'''
-I have gathered:
-📄 Captions from trending Instagram posts about "{searched_term}"
-🔖 Hashtags from those same top-performing posts
-
-🔍 Please combine both sources to generate a unified insight report showing **what's actually trending in the domain of "{searched_term}"** on Instagram.
-📢 Final goal: Tell me what's trending in "{searched_term}" *based on real post behavior*, not just the words.
-Make it comprehensive, engaging, and clearly structured in en-US English.
-'''
-
-    captions_text = "\n".join(captions_list)
-    hashtag_text = "\n".join(hashtag_list)
-
-    response1 = model.invoke(prompt1 + captions_text)
-    response2 = model.invoke(prompt2 + hashtag_text)
-    response_final = model.invoke(prompt3 + response1.content + response2.content)
-
-    # Generate hashtag string for wordcloud
-    most_common_hashtags = Counter(hashtag_list).most_common(15)
-    top_15=[i for i, _ in most_common_hashtags]
-    hashtag_string = " ".join(top_15)
-
-    return {
-        "searched_term": searched_term,
-        "captions": captions_list,
-        "hashtags": hashtag_list,
-        "insight": response_final.content,
-        "locations": unique_locations,
-        "hashtag_string": hashtag_string,
-        "post_display_data": post_display_data,
-        "url_list": url_list
-    }
+        text = job.partial.get("insight_parts", {}).get("synthesis", "")
+        if len(text) > shown:
+            yield text[shown:]
+            shown = len(text)
+        elif job.finished:
+            return
+        else:
+            time.sleep(0.05)
+
+@st.fragment(run_every=2)
+def show_job_progress(job_id):
+    """Poll a background job, previewing posts while the insight is generated"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        st.session_state.pop("job_id", None)
+        return
+
+    if job.status == "done":
+        st.session_state["result_set"] = job.result["result_set"]
+        st.session_state["result"] = job.result["result"]
+        st.session_state["trace"] = job.result["trace"]
+        # The job may have been started by someone with a different slider value;
+        # recording its threshold lets the normal re-filter path catch up.
+        st.session_state["min_likes"] = job.meta["min_likes"]
+        st.session_state.pop("job_id", None)
+        st.rerun()
+    elif job.status == "failed":
+        st.session_state.pop("job_id", None)
+        st.error(f"Analyzing #{job.meta['searched_term']} failed: {job.error}")
+        return
+
+    st.info(f"📱 #{job.meta['searched_term']}: {job.stage}... ({job.elapsed():.0f}s)")
+    preview = job.partial.get("preview")
+    if preview:
+        st.caption(f"Found {len(preview['post_display_data'])} posts and {len(preview['hashtag_counts'])} hashtags so far")
+        st.write("Top hashtags: " + ", ".join(f"#{tag}" for tag in list(preview["hashtag_counts"])[:10]))
+        for caption in preview["captions"][:3]:
+            st.markdown(f"> {caption[:200]}")
+
+    # Sub-analyses appear as soon as they stream in; the report is followed token by token
+    parts = job.partial.get("insight_parts", {})
+    for part in ("captions", "hashtags"):
+        if part in parts:
+            with st.expander(INSIGHT_PARTS[part]):
+                st.markdown(parts[part])
+    if "synthesis" in parts:
+        st.subheader(INSIGHT_PARTS["synthesis"])
+        st.write_stream(follow_report(job))
+        st.rerun()
+
+@st.fragment(run_every=2)
+def show_batch_progress(job_id):
+    """Poll a background comparison, showing which hashtags have finished"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        st.session_state.pop("batch_job_id", None)
+        return
+
+    if job.status == "done":
+        st.session_state["batch_result"] = job.result
+        st.session_state.pop("batch_job_id", None)
+        st.rerun()
+    elif job.status == "failed":
+        st.session_state.pop("batch_job_id", None)
+        st.error(f"Comparing hashtags failed: {job.error}")
+        return
+
+    terms = job.meta["terms"]
+    finished = job.partial.get("finished", [])
+    st.progress(len(finished) / len(terms), text=f"📱 {job.stage}... ({len(finished)}/{len(terms)}, {job.elapsed():.0f}s)")
     
 # st.sidebar.markdown("""
 #         <style>
@@ -358,7 +340,13 @@ with st.sidebar:
         </div>
         """, unsafe_allow_html=True)
         
-        searched_term = st.text_input("🔍 Search Hashtag", placeholder="#fashion, #travel, etc.")
+        mode = st.radio("Mode", ["Single hashtag", "Compare hashtags"], horizontal=True)
+
+        if mode == "Single hashtag":
+            searched_term = st.text_input("🔍 Search Hashtag", placeholder="#fashion, #travel, etc.")
+        else:
+            batch_text = st.text_area("🔍 Hashtags to Compare", placeholder="#fashion, #travel, #food ...")
+            batch_insights = st.checkbox("🧠 Generate insights per hashtag", value=False)
         
         # Add minimum likes filter instead of location
         min_likes = st.slider("❤️ Minimum Likes", min_value=0, max_value=10000, value=0, step=100)
@@ -366,22 +354,72 @@ with st.sidebar:
         # Styled button
         analyze = st.button("✨ Analyze Trends")
 
-if analyze:
-    with st.spinner("📱 Analyzing Instagram trends..."):
-        result = run_analysis(searched_term, min_likes)
-        st.session_state["result"] = result
-        st.session_state["min_likes"] = min_likes
+        llm_stats = llm_cache.stats()
+        st.caption(f"🧠 LLM cache: {llm_stats['hits']} hits · {llm_stats['misses']} misses")
+
+insight_cache = st.session_state.setdefault("insight_cache", {})
+
+if analyze and mode == "Compare hashtags" and not parse_terms(batch_text):
+    st.warning("Enter at least one hashtag to compare.")
+elif analyze and mode == "Compare hashtags":
+    st.session_state["batch_job_id"] = submit_batch(parse_terms(batch_text), min_likes, batch_insights).id
+elif analyze:
+    st.session_state["job_id"] = submit_analysis(searched_term, min_likes).id
+
+if "job_id" in st.session_state:
+    show_job_progress(st.session_state["job_id"])
+if "batch_job_id" in st.session_state:
+    show_batch_progress(st.session_state["batch_job_id"])
 
 # Main content
-if "result" in st.session_state:
+if mode == "Compare hashtags" and "batch_result" in st.session_state:
+    batch_result = st.session_state["batch_result"]
+    comparison = batch_result["comparison"]
+
+    st.markdown(f"""
+    <div style="text-align: center; padding: 20px; background: linear-gradient(45deg, #833AB4, #E1306C, #F77737); color: white; border-radius: 10px; margin-bottom: 20px;">
+        <h1>📸 Comparing {len(batch_result["terms"])} Hashtags</h1>
+    </div>
+    """, unsafe_allow_html=True)
+
+    for term, error in batch_result["errors"].items():
+        st.warning(f"#{term} could not be analyzed: {error}")
+
+    st.caption(f"Filtered to posts with at least {batch_result['min_likes']} likes · finished in {batch_result['elapsed_seconds']:.1f}s")
+
+    st.subheader("📋 Summary")
+    if comparison["summary"]:
+        st.dataframe(pd.DataFrame(comparison["summary"]), use_container_width=True, hide_index=True)
+
+    st.subheader("🔗 Shared Hashtags")
+    if comparison["shared_hashtags"]:
+        st.plotly_chart(
+            bar_chart(comparison["shared_hashtags"], "hashtag", "searches", "occurrences",
+                      "Hashtags appearing across searches"),
+            use_container_width=True
+        )
+    else:
+        st.info("No hashtags are shared between these searches.")
+
+    for term, term_result in batch_result["results"].items():
+        with st.expander(f"#{term} · {term_result['stats']['posts']} posts"):
+            if term_result.get("insight"):
+                st.markdown(term_result["insight"])
+            st.write("Top hashtags: " + ", ".join(f"#{tag}" for tag in list(term_result["hashtag_counts"])[:10]))
+
+elif "result" in st.session_state:
     result = st.session_state["result"]
     
-    # Re-analyze if minimum likes filter has changed
-    if "min_likes" in st.session_state and st.session_state["min_likes"] != min_likes:
-        with st.spinner(f"Filtering results for minimum {min_likes} likes..."):
-            result = run_analysis(searched_term, min_likes)
-            st.session_state["result"] = result
-            st.session_state["min_likes"] = min_likes
+    # Re-filter the scraped posts in the background if the minimum likes filter has changed;
+    # the current result stays on screen while the new insight streams in above it
+    if ("min_likes" in st.session_state and st.session_state["min_likes"] != min_likes
+            and "job_id" not in st.session_state):
+        job = submit_refilter(st.session_state["result_set"], min_likes, insight_cache)
+        st.session_state["job_id"] = job.id
+        # Slider moves that keep the same posts reuse the cached insight and finish at once;
+        # anything slower is followed by the progress fragment after the rerun
+        job.wait(0.5)
+        st.rerun()
 
     st.markdown(f"""
     <div style="text-align: center; padding: 20px; background: linear-gradient(45deg, #833AB4, #E1306C, #F77737); color: white; border-radius: 10px; margin-bottom: 20px;">
@@ -389,21 +427,16 @@ if "result" in st.session_state:
     </div>
     """, unsafe_allow_html=True)
 
-    tab1, tab2, tab3, tab4 = st.tabs(["📢 Insight", "📸 Captions", "🏷️ Hashtags", "🔝 Posts"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📢 Insight", "📸 Captions", "🏷️ Hashtags", "🔝 Posts", "🛠️ Debug"])
 
     with tab1:
         st.header(f"📈 Trends for: #{result['searched_term']}")
         
         # Display wordcloud in the final insights tab
         st.subheader("☁️ Trending Topics Word Cloud")
-        # Generate wordcloud here instead of storing the object
+        # Word cloud PNG is rendered once per hashtag string and cached across reruns
         if result["hashtag_string"]:
-            wordcloud = WordCloud(width=800, height=400, background_color="white", 
-                                  colormap="plasma").generate(result["hashtag_string"])
-            fig_wc, ax_wc = plt.subplots(figsize=(10, 5))
-            ax_wc.imshow(wordcloud, interpolation="bilinear")
-            ax_wc.axis("off")
-            st.pyplot(fig_wc)
+            st.image(wordcloud_png(result["hashtag_string"]), use_container_width=True)
         else:
             st.info("No hashtags available to generate wordcloud.")
         
@@ -414,6 +447,23 @@ if "result" in st.session_state:
             unsafe_allow_html=True
         )
 
+        # Topic clusters the caption analysis was based on (only for larger pulls)
+        clusters = result.get("clusters")
+        if clusters:
+            st.subheader("🧩 Caption Themes")
+            cluster_rows = [
+                {"Theme": f"{cluster['cluster']}. {', '.join(cluster['terms'][:3])}", "Posts": cluster["size"]}
+                for cluster in clusters
+            ]
+            st.plotly_chart(
+                bar_chart(cluster_rows, 'Theme', 'Posts', 'Posts', f"{len(clusters)} caption clusters"),
+                use_container_width=True
+            )
+            for cluster in clusters:
+                with st.expander(f"Theme {cluster['cluster']}: {', '.join(cluster['terms'])} · {cluster['size']} posts ({cluster['share']:.0%})"):
+                    for example in cluster["examples"]:
+                        st.markdown(f"> {example[:300]}")
+
     with tab2:
         st.subheader("🔟 Top Trending Captions")
         
@@ -435,27 +485,63 @@ if "result" in st.session_state:
     with tab3:
         st.subheader("📊 Hashtag Analytics")
         
-        # Interactive hashtag analysis
-        hashtag_freq = pd.Series(result["hashtags"]).value_counts()
+        # Interactive hashtag analysis (counted once per result, most frequent first)
+        hashtag_freq = pd.Series(result["hashtag_counts"], dtype="int64")
         
         # Top hashtags chart using Plotly with Instagram colors
         top_hashtags = hashtag_freq.head(10).reset_index()
         top_hashtags.columns = ['Hashtag', 'Count']
         
-        fig = px.bar(
-            top_hashtags, 
-            x='Hashtag', 
-            y='Count',
-            color='Count',
-            color_continuous_scale=['#833AB4', '#E1306C', '#F77737', '#FCAF45'],
-            title="Top 10 Hashtags"
-        )
-        fig.update_layout(
-            xaxis_tickangle=-45,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)'
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        if top_hashtags.empty:
+            st.info("None of these posts use hashtags.")
+        else:
+            st.plotly_chart(
+                bar_chart(top_hashtags.to_dict("records"), 'Hashtag', 'Count', 'Count', "Top 10 Hashtags"),
+                use_container_width=True
+            )
+
+        # Co-occurrence analytics: which tags rise with engagement and which travel together
+        graph = result.get("hashtag_graph")
+        if graph and graph["trending"]:
+            st.subheader("🔥 Trending Hashtags")
+            trending_rows = [
+                {"Hashtag": row["hashtag"], "Trend Score": row["score"], "Engagement": row["engagement"]}
+                for row in graph["trending"][:10]
+            ]
+            st.plotly_chart(
+                bar_chart(trending_rows, 'Hashtag', 'Trend Score', 'Engagement',
+                          "Trend score: post count x likes compared with the average post"),
+                use_container_width=True
+            )
+
+        if graph and graph["communities"]:
+            st.subheader("🤝 Hashtag Communities")
+            for community in graph["communities"]:
+                more = community["size"] - len(community["hashtags"])
+                tags = " ".join(f"#{tag}" for tag in community["hashtags"]) + (f" +{more} more" if more > 0 else "")
+                st.markdown(f"**{community['community']}.** {tags} · {community['posts']} posts, ❤️ {community['likes']}")
+
+        if graph and graph["pairs"]:
+            st.subheader("🔗 Strongest Pairings")
+            pairs = pd.DataFrame(graph["pairs"])[["hashtag_a", "hashtag_b", "posts", "likes", "lift", "npmi"]]
+            pairs.columns = ["Hashtag", "Paired With", "Posts", "Likes", "Lift", "NPMI"]
+            st.dataframe(pairs, use_container_width=True, hide_index=True)
+
+        # Compare with the previous time this hashtag was analyzed or tracked
+        st.subheader("📈 Changes Since Last Run")
+        changes = get_trend_store().changes_since_last(result["searched_term"])
+        if changes:
+            previous_run = pd.to_datetime(changes["previous_at"], unit="s").strftime("%Y-%m-%d %H:%M")
+            st.metric("New posts", changes["new_post_count"], help=f"Compared with the snapshot from {previous_run} UTC")
+            col_tags, col_likes = st.columns(2)
+            with col_tags:
+                st.markdown("**Hashtag movement**")
+                st.dataframe(pd.DataFrame(changes["hashtag_changes"]), use_container_width=True, hide_index=True)
+            with col_likes:
+                st.markdown("**Biggest like gains**")
+                st.dataframe(pd.DataFrame(changes["like_gains"]), use_container_width=True, hide_index=True)
+        else:
+            st.info("Analyze this hashtag again later to see how it changes over time.")
 
     with tab4:
         st.subheader("🔝 Top Trending Posts")
@@ -464,10 +550,8 @@ if "result" in st.session_state:
         sort_by = st.radio("Sort by:", ["Most Likes", "Recently Added"], horizontal=True)
         
         if result["post_display_data"]:
-            # Sort posts based on selection
+            # Posts come out of the result set already ordered by likes
             posts = result["post_display_data"]
-            if sort_by == "Most Likes":
-                posts = sorted(posts, key=lambda x: x.get("likes", 0), reverse=True)
             
             # Create 3 columns for posts display
             cols = st.columns(3)
@@ -503,6 +587,20 @@ if "result" in st.session_state:
         else:
             st.info("No post data available to display.")
 
+    with tab5:
+        st.subheader("🛠️ Pipeline Trace")
+        trace = st.session_state.get("trace")
+        if trace:
+            spans = trace["spans"]
+            st.caption(f"{spans[0]['name']} · trace {trace['trace_id']} · {spans[0]['duration_ms'] / 1000:.2f}s total")
+            stages = pd.DataFrame(tracing.summarize(trace))
+            st.dataframe(stages.fillna(0), use_container_width=True, hide_index=True)
+            st.caption(f"🧠 LLM cache: {llm_cache.stats()['hits']} hits · {llm_cache.stats()['misses']} misses (this process)")
+            with st.expander("Raw spans (JSON)"):
+                st.json(trace)
+        else:
+            st.info("No trace recorded for this result.")
+
 else:
     # Welcome screen with Instagram styling
     st.markdown("""
@@ -0,0 +1,128 @@
+"""Analyze many hashtags at once with concurrent Apify runs.
+
+Usage:
+
+    python cli.py batch fashion travel food --min-likes 100 --concurrency 8 > batch.json
+"""
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+import tracing
+from pipeline import analyze_result_set, load_result_set
+
+
+def parse_terms(text):
+    """Split comma/whitespace separated hashtags, dropping '#' prefixes and duplicates"""
+    terms = []
+    seen = set()
+    for term in re.split(r"[\s,]+", text):
+        term = term.strip().lstrip("#")
+        if term and term.lower() not in seen:
+            seen.add(term.lower())
+            terms.append(term)
+    return terms
+
+
+def _analyze_one(term, client, min_likes, cache, model, scrape_options, insight_options):
+    with tracing.trace("analysis", hashtag=term, min_likes=min_likes) as trace:
+        result_set = load_result_set(term, client, cache, **scrape_options)
+        if model is not None:
+            result = analyze_result_set(result_set, model, min_likes, **insight_options)
+        else:
+            result = result_set.view(min_likes)
+    result["trace"] = trace.to_dict()
+
+    likes = result_set.filter_by_likes(min_likes)["likes"]
+    result["stats"] = {
+        "posts": int(len(likes)),
+        "total_likes": int(likes.sum()),
+        "median_likes": float(likes.median()) if len(likes) else 0.0,
+    }
+    return result
+
+
+def compare_results(results, top_n=25):
+    """Cross-hashtag view: per-hashtag summary rows and the tags they share"""
+    summary = []
+    for term, result in results.items():
+        summary.append({
+            "hashtag": term,
+            **result["stats"],
+            "top_hashtags": list(result["hashtag_counts"])[:5],
+        })
+
+    counts = pd.DataFrame(
+        {term: pd.Series(result["hashtag_counts"], dtype="int64") for term, result in results.items()}
+    ).fillna(0)
+    if counts.empty:
+        return {"summary": summary, "shared_hashtags": []}
+
+    shared = pd.DataFrame({
+        "hashtag": counts.index,
+        "searches": (counts > 0).sum(axis=1).to_numpy(),
+        "occurrences": counts.sum(axis=1).astype("int64").to_numpy(),
+    })
+    shared = shared[shared["searches"] > 1].sort_values(
+        ["searches", "occurrences"], ascending=False
+    ).head(top_n)
+
+    return {"summary": summary, "shared_hashtags": shared.to_dict("records")}
+
+
+def analyze_batch(terms, client, min_likes=0, max_concurrency=5, cache=None, model=None,
+                  scrape_options=None, insight_options=None, on_result=None):
+    """Scrape and analyze several hashtags concurrently.
+
+    Up to `max_concurrency` Apify runs are in flight at once and each hashtag
+    is processed as soon as its dataset is ready, so wall time tracks the
+    slowest run rather than the sum. Insights are only generated when a
+    `model` is given. `on_result(term, result, error)` is called as each
+    hashtag finishes.
+    """
+    scrape_options = scrape_options or {}
+    insight_options = insight_options or {}
+    started = time.monotonic()
+    results = {}
+    errors = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+        futures = {
+            pool.submit(_analyze_one, term, client, min_likes, cache, model, scrape_options, insight_options): term
+            for term in terms
+        }
+        for future in as_completed(futures):
+            term = futures[future]
+            try:
+                results[term] = future.result()
+            except Exception as e:
+                # One failed hashtag shouldn't sink the whole batch
+                errors[term] = str(e)
+            if on_result is not None:
+                on_result(term, results.get(term), errors.get(term))
+
+    # Keep the caller's ordering rather than completion order
+    results = {term: results[term] for term in terms if term in results}
+    return {
+        "terms": list(terms),
+        "min_likes": min_likes,
+        "results": results,
+        "errors": errors,
+        "comparison": compare_results(results),
+        "elapsed_seconds": round(time.monotonic() - started, 3),
+    }
+
+
+
+def run_batch_job(job, terms, client, **options):
+    """JobQueue body for analyze_batch; `job.partial["finished"]` lists hashtags done so far"""
+    finished = []
+
+    def on_result(term, result, error):
+        finished.append(term)
+        job.update(stage=f"finished #{term}", finished=list(finished))
+
+    job.update(stage=f"scraping {len(terms)} hashtags", finished=[])
+    return analyze_batch(terms, client, on_result=on_result, **options)
@@ -0,0 +1,84 @@
+"""Micro-benchmark: single-pass iterative extraction vs the old recursive double walk.
+
+Run from the repository root:
+
+    python benchmarks/bench_extract.py --sizes 10000 100000
+
+See bench_pipeline.py for timings of every pipeline stage.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction import extract_posts_with_locations  # noqa: E402
+from synthetic import synthetic_items  # noqa: E402
+
+
+def legacy_find_all_key_values(data, target_key):
+    results = []
+    def recurse(obj):
+        if isinstance(obj, dict):
+            for key, value in obj.items():
+                if key == target_key:
+                    results.append(value)
+                if isinstance(value, (dict, list)):
+                    recurse(value)
+        elif isinstance(obj, list):
+            for item in obj:
+                recurse(item)
+    recurse(data)
+    return results
+
+
+def legacy_extract(items):
+    all_locations = legacy_find_all_key_values(items, "locationName")
+    unique_locations = list(set([loc for loc in all_locations if loc]))
+    top_posts = legacy_find_all_key_values(items, "topPosts")
+    posts = []
+    for item in items:
+        location_name = item.get("locationName", None)
+        if "topPosts" in item and isinstance(item["topPosts"], list):
+            for post in item["topPosts"]:
+                posts.append({
+                    "location": location_name,
+                    "url": post.get("url", ""),
+                    "caption": post.get("caption", ""),
+                    "hashtags": post.get("hashtags", []),
+                    "thumbnail": post.get("cover_artwork_thumbnail_uri", ""),
+                    "likes": post.get("likesCount", 0)
+                })
+    if not posts and top_posts:
+        for post in top_posts:
+            if isinstance(post, dict):
+                posts.append({"location": None, "url": post.get("url", "")})
+    return posts, unique_locations
+
+
+def best_of(fn, items, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(items)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'posts':>10} {'legacy (s)':>12} {'single-pass (s)':>16} {'speedup':>8}")
+    for size in args.sizes:
+        items = synthetic_items(size)
+        legacy = best_of(legacy_extract, items, args.repeat)
+        current = best_of(extract_posts_with_locations, items, args.repeat)
+        print(f"{size:>10} {legacy:>12.3f} {current:>16.3f} {legacy / current:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Benchmark each stage of the analysis pipeline on synthetic Apify datasets.
+
+Run from the repository root:
+
+    python benchmarks/bench_pipeline.py --sizes 1000 10000 100000 --output bench.json
+    python benchmarks/bench_pipeline.py --sizes 1000000 --repeat 1
+    python benchmarks/bench_pipeline.py --baseline bench.json --output new.json
+
+Every stage is timed best-of `--repeat` and then run once more under
+tracemalloc for its peak allocation. Apify and Gemini are replaced by the
+fakes in synthetic.py, so only local work is measured. Results are written
+as JSON rows keyed by (posts, stage); with `--baseline` each row is
+compared against an earlier run and slowdowns past `--threshold` are
+flagged (and fail the run with `--fail-on-regression`).
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import tracing  # noqa: E402
+from caption_clusters import cluster_captions  # noqa: E402
+from extraction import collect_key_values, extract_posts_with_locations  # noqa: E402
+from insights import generate_insight  # noqa: E402
+from pipeline import run_analysis  # noqa: E402
+from prompt_packing import chunk_by_tokens, dedup_captions, format_hashtag_counts  # noqa: E402
+from result_set import ResultSet  # noqa: E402
+from synthetic import FakeApifyClient, fake_chat_model, synthetic_items  # noqa: E402
+
+STAGES = [
+    "generate", "key_walk", "extract", "index", "filter", "hashtag_counts", "hashtag_graph", "view",
+    "cluster", "prompt_packing", "insight", "end_to_end",
+]
+# Stages whose output later stages consume; they run even when not selected
+BUILD_STAGES = {"generate", "extract", "index", "view"}
+
+
+def measure(fn, repeat, memory=True):
+    """Best wall time over `repeat` calls, plus peak traced allocation of one more call"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return min(timings), peak
+
+
+def stage_functions(size, token_budget=8000):
+    """Yield (stage, fn) pairs for one dataset size, building inputs as we go"""
+    state = {}
+
+    def generate():
+        state["items"] = synthetic_items(size)
+    yield "generate", generate
+
+    items = state["items"]
+    yield "key_walk", lambda: collect_key_values(items, ("locationName", "topPosts"))
+
+    def extract():
+        state["posts"], state["locations"] = extract_posts_with_locations(items)
+    yield "extract", extract
+
+    def index():
+        state["result_set"] = ResultSet("benchmark", state["posts"], state["locations"])
+    yield "index", index
+
+    result_set = state["result_set"]
+    # Filter at the median so half the posts survive, like a typical slider position
+    min_likes = int(result_set.posts["likes"].median())
+    yield "filter", lambda: result_set.filter_by_likes(min_likes)
+    yield "hashtag_counts", lambda: result_set.filtered_hashtags(min_likes).value_counts(sort=True)
+    yield "hashtag_graph", lambda: result_set.hashtag_graph(min_likes)
+
+    def view():
+        state["view"] = result_set.view(min_likes)
+    yield "view", view
+
+    view_result = state["view"]
+    yield "cluster", lambda: cluster_captions(view_result["captions"])
+
+    def prompt_packing():
+        captions = dedup_captions(view_result["captions"])
+        chunk_by_tokens(captions, token_budget)
+        format_hashtag_counts(view_result["hashtag_counts"], token_budget // 4)
+    yield "prompt_packing", prompt_packing
+
+    model = fake_chat_model()
+    yield "insight", lambda: generate_insight(
+        model, "benchmark", view_result["captions"], view_result["hashtag_counts"], token_budget=token_budget
+    )
+
+    client = FakeApifyClient(items)
+
+    yield "end_to_end", lambda: run_analysis(
+        "benchmark", min_likes, client=client, model=model, cache=False, store=False
+    )
+
+
+def run_benchmarks(sizes, repeat=3, stages=None, memory=True):
+    rows = []
+    for size in sizes:
+        for stage, fn in stage_functions(size):
+            if stages and stage not in stages:
+                if stage in BUILD_STAGES:
+                    fn()
+                continue
+            seconds, peak = measure(fn, 1 if stage == "generate" else repeat, memory)
+            row = {"posts": size, "stage": stage, "seconds": round(seconds, 6),
+                   "peak_mb": None if peak is None else round(peak / 2 ** 20, 3)}
+            rows.append(row)
+            print(f"{size:>9} {stage:<16} {seconds:>10.4f}s"
+                  + ("" if peak is None else f" {row['peak_mb']:>10.1f} MB"), file=sys.stderr)
+    return rows
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(rows, baseline_rows, threshold=1.2):
+    """Join rows with a baseline run on (posts, stage) and flag slowdowns"""
+    baseline = {(row["posts"], row["stage"]): row for row in baseline_rows}
+    comparison = []
+    for row in rows:
+        before = baseline.get((row["posts"], row["stage"]))
+        if before is None or not before["seconds"]:
+            continue
+        ratio = row["seconds"] / before["seconds"]
+        comparison.append({
+            "posts": row["posts"],
+            "stage": row["stage"],
+            "baseline_seconds": before["seconds"],
+            "seconds": row["seconds"],
+            "ratio": round(ratio, 3),
+            "regression": ratio > threshold,
+        })
+    return comparison
+
+
+def print_comparison(comparison, stream=sys.stderr):
+    print(f"\n{'posts':>9} {'stage':<16} {'baseline':>10} {'current':>10} {'ratio':>7}", file=stream)
+    for row in comparison:
+        flag = "  <-- slower" if row["regression"] else ""
+        print(f"{row['posts']:>9} {row['stage']:<16} {row['baseline_seconds']:>10.4f} "
+              f"{row['seconds']:>10.4f} {row['ratio']:>6.2f}x{flag}", file=stream)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, help="only time these stages")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--output", help="write results as JSON to this file (default: stdout)")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    # Keep trace logging out of the measurements
+    os.environ.pop("TRACE_LOG_PATH", None)
+    tracing.logger.disabled = True
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "repeat": args.repeat,
+        },
+        "results": run_benchmarks(args.sizes, args.repeat, args.stages, memory=not args.no_memory),
+    }
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["comparison"] = compare(report["results"], json.load(f)["results"], args.threshold)
+        print_comparison(report["comparison"])
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.fail_on_regression and any(row["regression"] for row in report.get("comparison", [])):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Synthetic Apify datasets and fake Apify/Gemini backends for the benchmarks.
+
+Items mimic the instagram-scraper "details" output the pipeline consumes:
+one item per hashtag page with `topPosts`/`latestPosts` lists whose posts
+carry `url`, `caption`, `hashtags`, `likesCount`, `locationName` and some
+nested child posts, so the key walk has realistic depth to get through.
+"""
+import asyncio
+import random
+
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+import tracing
+
+WORDS = (
+    "sunset beach coffee morning vibes travel city street style outfit weekend "
+    "friends food brunch mountain hike summer love life happy art design fitness "
+    "workout healthy recipe homemade new collection shop sale limited drop"
+).split()
+LOCATIONS = [None, None, "Paris", "Tokyo", "Lima", "New York", "Lisbon", "Cape Town"]
+
+
+def synthetic_items(n_posts, posts_per_item=50, n_tags=2000, seed=0):
+    """Build scraper items holding `n_posts` top posts in total.
+
+    Hashtags follow a Zipf-like distribution over `n_tags` tags and about a
+    tenth of captions are reposts of an earlier one, so hashtag counting and
+    caption dedup see the skew they get on real data.
+    """
+    rnd = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(n_tags)]
+    tags = [f"tag{rank}" for rank in range(n_tags)]
+    captions = []
+    items = []
+    for i in range(0, n_posts, posts_per_item):
+        posts = []
+        for j in range(i, min(i + posts_per_item, n_posts)):
+            post_tags = rnd.choices(tags, weights=weights, k=rnd.randint(3, 15))
+            if captions and rnd.random() < 0.1:
+                caption = rnd.choice(captions)
+            else:
+                caption = " ".join(rnd.choices(WORDS, k=rnd.randint(5, 40)))
+                caption += " " + " ".join(f"#{tag}" for tag in post_tags[:5])
+                captions.append(caption)
+            posts.append({
+                "id": str(j),
+                "url": f"https://www.instagram.com/p/{j:x}/",
+                "caption": caption,
+                "hashtags": post_tags,
+                "likesCount": int(rnd.paretovariate(1.2) * 10),
+                "locationName": rnd.choice(LOCATIONS),
+                "cover_artwork_thumbnail_uri": f"https://cdn.example.com/{j:x}.jpg",
+                "childPosts": [
+                    {"type": "Image", "dimensionsHeight": 1080, "taggedUsers": [{"username": f"user{j % 97}"}]}
+                    for _ in range(rnd.randint(0, 3))
+                ],
+            })
+        items.append({
+            "name": f"page{i // posts_per_item}",
+            "locationName": rnd.choice(LOCATIONS),
+            "postsCount": n_posts,
+            "topPosts": posts,
+            "latestPosts": posts[:5],
+        })
+    return items
+
+
+class FakeApifyClient:
+    """Stands in for ApifyClient.scrape_items: serves items as JSON pages.
+
+    Pages are encoded up front and parsed on the way out, so the benchmark
+    still pays the JSON decoding a real download does, and each page is
+    reported to tracing like an HTTP response.
+    """
+
+    def __init__(self, items, page_size=20):
+        self.pages = [_json.dumps(items[i:i + page_size]) for i in range(0, len(items), page_size)]
+
+    def scrape_items(self, payload, deadline=900, page_size=20):
+        with tracing.span("apify.start_run"):
+            pass
+        with tracing.span("apify.wait_for_run"):
+            pass
+        return self._iter_pages()
+
+    def _iter_pages(self):
+        for page in self.pages:
+            tracing.record_http({"bytes": len(page), "elapsed": 0.0, "attempt": 0, "error": None, "status": 200})
+            yield from _json.loads(page)
+
+
+def fake_chat_model():
+    """A LangChain chat model that answers instantly with a short canned reply.
+
+    Token usage is estimated at ~4 characters per token so traces still
+    carry prompt/response sizes.
+    """
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    class FakeChatModel(BaseChatModel):
+        @property
+        def _llm_type(self):
+            return "benchmark-fake"
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            prompt = messages[-1].content
+            text = f"- summary of {len(prompt)} characters"
+            usage = {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4,
+                     "total_tokens": (len(prompt) + len(text)) // 4}
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text, usage_metadata=usage))])
+
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+            await asyncio.sleep(0)
+            return self._generate(messages, stop, **kwargs)
+
+    return FakeChatModel()
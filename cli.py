@@ -0,0 +1,234 @@
+"""Headless entry point for the analyzer: JSON on stdout or over HTTP.
+
+Usage:
+
+    python cli.py analyze fashion --min-likes 100
+    python cli.py batch fashion travel food --concurrency 8 > batch.json
+    python cli.py track fashion travel          # e.g. hourly from cron
+    python cli.py changes fashion
+    python cli.py serve --port 8080
+
+The HTTP server exposes the same operations:
+
+    GET  /health
+    GET  /analyze?hashtag=fashion&min_likes=100&insight=0
+    POST /batch      {"hashtags": ["fashion", "travel"], "min_likes": 0, "insights": false}
+    GET  /changes?hashtag=fashion
+
+Nothing heavier than the pipeline is imported up front; Streamlit is never
+loaded, and LangChain only once an insight is actually requested.
+"""
+import argparse
+import json
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pipeline
+import tracing
+
+
+def _dump(output):
+    json.dump(output, sys.stdout, indent=2, ensure_ascii=False)
+    print()
+
+
+def _flag(value):
+    return str(value).lower() in ("1", "true", "yes")
+
+
+class BadRequest(ValueError):
+    """Invalid request parameters; only these are answered with a 400"""
+
+
+def _required(params, name):
+    value = params.get(name)
+    if not value:
+        raise BadRequest(f"missing parameter {name!r}")
+    return value
+
+
+def _int(params, name, default=0):
+    try:
+        return int(params.get(name, default))
+    except (TypeError, ValueError):
+        raise BadRequest(f"{name!r} must be an integer") from None
+
+
+def _batch_body(raw):
+    try:
+        body = json.loads(raw or b"{}")
+    except ValueError as e:
+        raise BadRequest(f"body is not valid JSON: {e}") from None
+    if not isinstance(body, dict):
+        raise BadRequest("body must be a JSON object")
+    hashtags = _required(body, "hashtags")
+    if not isinstance(hashtags, list) or not all(isinstance(tag, str) for tag in hashtags):
+        raise BadRequest("'hashtags' must be a list of strings")
+    concurrency = body.get("concurrency")
+    return {
+        "hashtags": hashtags,
+        "min_likes": _int(body, "min_likes"),
+        "concurrency": None if concurrency is None else _int(body, "concurrency"),
+        "insights": bool(body.get("insights", False)),
+    }
+
+
+def analyze(hashtag, min_likes=0, insight=True, use_cache=True):
+    return pipeline.run_analysis(
+        hashtag, min_likes,
+        cache=None if use_cache else False,
+        insight=insight,
+    )
+
+
+def batch(hashtags, min_likes=0, concurrency=None, insights=False, use_cache=True):
+    from batch import analyze_batch, parse_terms
+
+    terms = parse_terms(" ".join(hashtags))
+    return analyze_batch(
+        terms, pipeline.get_apify_client(),
+        min_likes=min_likes,
+        max_concurrency=concurrency or int(os.getenv("BATCH_CONCURRENCY", 5)),
+        cache=pipeline.get_scrape_cache() if use_cache else None,
+        model=pipeline.get_model() if insights else None,
+        scrape_options=pipeline.scrape_options_from_env(),
+        insight_options=pipeline.insight_options_from_env(),
+        on_result=lambda term, result, error: print(
+            f"#{term}: " + (f"failed: {error}" if error else f"{result['stats']['posts']} posts"),
+            file=sys.stderr,
+        ),
+    )
+
+
+def track(hashtags):
+    store = pipeline.get_trend_store()
+    client = pipeline.get_apify_client()
+    return {
+        hashtag: pipeline.track_hashtag(hashtag, client, store, **pipeline.scrape_options_from_env())
+        for hashtag in hashtags
+    }
+
+
+def changes(hashtag):
+    return pipeline.get_trend_store().changes_since_last(hashtag)
+
+
+class AnalysisHandler(BaseHTTPRequestHandler):
+    """JSON endpoints over the same functions the CLI subcommands use"""
+
+    server_version = "HashtagAnalyzer/1.0"
+
+    def _send(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self, parse, run):
+        """Validate the request with `parse()`, then answer with `run(**params)`.
+
+        Only parameter errors (BadRequest) are the client's fault; anything
+        raised while running, including malformed upstream responses, is a 502.
+        """
+        try:
+            params = parse()
+        except BadRequest as e:
+            self._send(400, {"error": f"bad request: {e}"})
+            return
+        try:
+            self._send(200, run(**params))
+        except Exception as e:
+            self._send(502, {"error": str(e) or e.__class__.__name__})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == "/health":
+            self._send(200, {"status": "ok"})
+        elif url.path == "/analyze":
+            self._handle(lambda: {
+                "hashtag": _required(query, "hashtag"),
+                "min_likes": _int(query, "min_likes"),
+                "insight": _flag(query.get("insight", "1")),
+                "use_cache": not _flag(query.get("no_cache", "0")),
+            }, analyze)
+        elif url.path == "/changes":
+            self._handle(lambda: {"hashtag": _required(query, "hashtag")}, changes)
+        else:
+            self._send(404, {"error": f"unknown path {url.path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/batch":
+            self._send(404, {"error": f"unknown path {url.path}"})
+            return
+
+        def parse():
+            length = _int(self.headers, "Content-Length")
+            return _batch_body(self.rfile.read(length))
+
+        self._handle(parse, batch)
+
+
+def serve(host="127.0.0.1", port=8080):
+    server = ThreadingHTTPServer((host, port), AnalysisHandler)
+    print(f"Serving on http://{host}:{server.server_port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Analyze Instagram hashtags without the Streamlit UI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    analyze_cmd = commands.add_parser("analyze", help="scrape and analyze one hashtag")
+    analyze_cmd.add_argument("hashtag")
+    analyze_cmd.add_argument("--min-likes", type=int, default=0)
+    analyze_cmd.add_argument("--no-insight", action="store_true", help="skip the Gemini insight")
+    analyze_cmd.add_argument("--no-cache", action="store_true", help="always start a fresh Apify run")
+
+    batch_cmd = commands.add_parser("batch", help="analyze several hashtags concurrently")
+    batch_cmd.add_argument("hashtags", nargs="+", help="hashtags to analyze (comma or space separated)")
+    batch_cmd.add_argument("--min-likes", type=int, default=0)
+    batch_cmd.add_argument("--concurrency", type=int)
+    batch_cmd.add_argument("--insights", action="store_true", help="also generate Gemini insights per hashtag")
+    batch_cmd.add_argument("--no-cache", action="store_true", help="always start fresh Apify runs")
+
+    track_cmd = commands.add_parser("track", help="scrape new posts and record a snapshot")
+    track_cmd.add_argument("hashtags", nargs="+")
+
+    changes_cmd = commands.add_parser("changes", help="show what changed since the previous snapshot")
+    changes_cmd.add_argument("hashtag")
+
+    serve_cmd = commands.add_parser("serve", help="serve the analyses as JSON over HTTP")
+    serve_cmd.add_argument("--host", default="127.0.0.1")
+    serve_cmd.add_argument("--port", type=int, default=8080)
+
+    args = parser.parse_args(argv)
+    load_dotenv()
+    tracing.configure_logging()
+
+    if args.command == "serve":
+        serve(args.host, args.port)
+    elif args.command == "analyze":
+        _dump(analyze(args.hashtag, args.min_likes, insight=not args.no_insight, use_cache=not args.no_cache))
+    elif args.command == "batch":
+        _dump(batch(args.hashtags, args.min_likes, args.concurrency, args.insights, use_cache=not args.no_cache))
+    elif args.command == "track":
+        _dump(track(args.hashtags))
+    else:
+        _dump(changes(args.hashtag))
+
+
+if __name__ == "__main__":
+    main()
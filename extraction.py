@@ -0,0 +1,91 @@
+def normalize_hashtag(hashtag):
+    """Canonical form of a searched or scraped hashtag: no '#', lower case"""
+    return hashtag.strip().lstrip("#").lower()
+
+
+def collect_key_values(data, target_keys):
+    """Collect the values of every key in `target_keys`, at any depth, in one walk.
+
+    Returns a dict mapping each target key to the list of values found, in the
+    same depth-first order a recursive walk would produce. Uses an explicit
+    stack of iterators so deeply nested scraper output can't hit the
+    recursion limit.
+    """
+    results = {key: [] for key in target_keys}
+    if isinstance(data, dict):
+        stack = [iter(data.items())]
+    elif isinstance(data, list):
+        stack = [iter(enumerate(data))]
+    else:
+        return results
+
+    push = stack.append
+    while stack:
+        for key, value in stack[-1]:
+            if key in results:
+                results[key].append(value)
+            value_type = type(value)
+            if value_type is dict:
+                push(iter(value.items()))
+                break
+            if value_type is list:
+                push(iter(enumerate(value)))
+                break
+        else:
+            stack.pop()
+
+    return results
+
+
+def find_all_key_values(data, target_key):
+    return collect_key_values(data, (target_key,))[target_key]
+
+
+def _post_data(post, location, thumbnail_key):
+    return {
+        "location": location,
+        "url": post.get("url", ""),
+        "caption": post.get("caption", ""),
+        "hashtags": post.get("hashtags", []),
+        "thumbnail": post.get(thumbnail_key, ""),
+        "likes": post.get("likesCount", 0)
+    }
+
+
+def extract_posts_with_locations(items):
+    """Extract posts with their corresponding locations.
+
+    `items` can be any iterable, including a generator streaming dataset pages,
+    so extraction runs while the download is still in progress. Each item is
+    walked once to pick up both nested location names and nested top posts.
+    Returns the posts and the unique location names seen.
+    """
+    posts_with_locations = []
+    locations = set()
+    top_posts = []
+
+    for item in items:
+        found = collect_key_values(item, ("locationName", "topPosts"))
+        locations.update(loc for loc in found["locationName"] if loc)
+
+        # Nested top posts are only needed as a fallback, stop collecting once we have real posts
+        if not posts_with_locations:
+            top_posts.extend(found["topPosts"])
+
+        if not isinstance(item, dict):
+            continue
+
+        # Each item might have a list of top posts
+        item_posts = item.get("topPosts")
+        if isinstance(item_posts, list):
+            location_name = item.get("locationName", None)
+            for post in item_posts:
+                posts_with_locations.append(_post_data(post, location_name, "cover_artwork_thumbnail_uri"))
+
+    # If we couldn't extract them properly, just use the raw data
+    if not posts_with_locations:
+        for post in top_posts:
+            if isinstance(post, dict):
+                posts_with_locations.append(_post_data(post, None, "thumbnailUrl"))
+
+    return posts_with_locations, list(locations)
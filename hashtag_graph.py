@@ -0,0 +1,214 @@
+"""Hashtag co-occurrence graph: pair statistics, communities and trend scores.
+
+Built from the long (post, hashtag) table in result_set.py. Tags become
+integer codes and every pair of tags sharing a post becomes one row of a
+COO adjacency list, so all scoring is NumPy/pandas vector work. Pair count
+grows with tags per post, not with the square of the vocabulary.
+"""
+import numpy as np
+import pandas as pd
+
+# Prior weight (in posts) pulling a rare tag's engagement towards average,
+# so a tag seen on a couple of viral posts doesn't top the chart
+ENGAGEMENT_PRIOR_POSTS = 5
+
+# Pairs must co-occur more often than independent tags would, by a margin that grows with
+# the number of pairs tested; otherwise a couple of shared posts between rare tags show up
+# as huge lifts and chain unrelated topics together
+PAIR_ALPHA = 0.05
+# ...and by enough to matter: on large scrapes, common tags co-occur slightly more than
+# chance just because long posts carry more tags (lift ~1.05, still "significant")
+MIN_PAIR_LIFT = 1.5
+
+
+def _pairs(post, tag, n_tags):
+    """Unique tag pairs (a < b) that share a post, with how many posts and which post rows"""
+    nodes = pd.DataFrame({"post": post, "tag": tag})
+    pairs = nodes.merge(nodes, on="post", suffixes=("_a", "_b"))
+    pairs = pairs[pairs["tag_a"].to_numpy() < pairs["tag_b"].to_numpy()]
+    keys = pairs["tag_a"].to_numpy(dtype="int64") * n_tags + pairs["tag_b"].to_numpy(dtype="int64")
+    uniq, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    return uniq // n_tags, uniq % n_tags, counts, inverse, pairs["post"].to_numpy()
+
+
+def cooccurrence_surprise(counts, expected):
+    """-ln of an upper bound on P(X >= counts) for X ~ Poisson(expected); 0 unless counts > expected.
+
+    Under independence a pair's shared-post count is roughly Poisson with
+    mean df_a * df_b / n_posts, so a pair is significant at level alpha when
+    its surprise is at least ln(1 / alpha). Uses P(X >= c) <= P(X = c) /
+    (1 - expected / (c + 1)) and Stirling's ln c!, so it needs no SciPy.
+    """
+    c, e = np.broadcast_arrays(np.asarray(counts, dtype="float64"), np.asarray(expected, dtype="float64"))
+    surprise = np.zeros(c.shape)
+    above = c > e
+    c, e = c[above], e[above]
+    log_factorial = c * np.log(c) - c + 0.5 * np.log(2 * np.pi * c)  # Stirling, a lower bound
+    surprise[above] = e - c * np.log(e) + log_factorial + np.log1p(-e / (c + 1))
+    return surprise
+
+
+def benjamini_hochberg(surprise, n_tested, alpha=PAIR_ALPHA):
+    """Which tests pass the Benjamini-Hochberg procedure, given -ln p-values.
+
+    `n_tested` counts every test, including ones not passed in (p = 1).
+    Controls the false discovery rate at `alpha`, and the chance of any
+    false discovery when nothing is associated, while letting a topic's
+    many moderately strong pairs through together.
+    """
+    surprise = np.asarray(surprise, dtype="float64")
+    ranked = np.sort(surprise)[::-1]
+    passes = np.flatnonzero(ranked >= np.log(max(n_tested, 1) / alpha) - np.log(np.arange(1, len(ranked) + 1)))
+    if not len(passes):
+        return np.zeros(len(surprise), dtype=bool)
+    return surprise >= ranked[passes[-1]]
+
+
+def _colour_classes(n_nodes, src, dst):
+    """Greedy graph colouring of a symmetric edge list; isolated nodes get -1"""
+    colour = np.full(n_nodes, -1)
+    order = np.argsort(src, kind="stable")
+    neighbours = dst[order]
+    starts = np.searchsorted(src[order], np.arange(n_nodes + 1))
+    for node in np.unique(src):
+        taken = set(colour[neighbours[starts[node]:starts[node + 1]]].tolist())
+        colour[node] = next(c for c in range(len(taken) + 1) if c not in taken)
+    return colour
+
+
+def label_propagation(n_nodes, src, dst, weight, max_iter=30):
+    """Weighted label propagation; returns a community label per node.
+
+    Each node takes the label with the largest total edge weight among its
+    neighbours, keeping its own label on a tie and otherwise preferring the
+    smaller one. Nodes update one colour class at a time (no two neighbours
+    move together), which stops the label swapping synchronous updates fall
+    into on cliques and chains and guarantees convergence.
+    """
+    labels = np.arange(n_nodes)
+    if not len(src):
+        return labels
+    src, dst = np.concatenate([src, dst]), np.concatenate([dst, src])
+    weight = np.concatenate([weight, weight])
+    colour = _colour_classes(n_nodes, src, dst)
+    for _ in range(max_iter):
+        changed = False
+        for current in range(colour.max() + 1):
+            uniq, inverse = np.unique(dst * n_nodes + labels[src], return_inverse=True)
+            score = np.bincount(inverse, weights=weight)
+            node, label = uniq // n_nodes, uniq % n_nodes
+            order = np.lexsort((label, label != labels[node], -score, node))
+            best = order[np.r_[True, node[order][1:] != node[order][:-1]]]
+            node, label = node[best], label[best]
+            update = (colour[node] == current) & (labels[node] != label)
+            if update.any():
+                labels[node[update]] = label[update]
+                changed = True
+        if not changed:
+            break
+    return labels
+
+
+def hashtag_graph(hashtags, likes, min_count=2, min_pair_count=2, max_share=0.5, top_n=20):
+    """Co-occurrence analytics for a (post, hashtag) table and per-post likes.
+
+    `likes[i]` is the like count of post i. Tags on fewer than `min_count`
+    posts are ignored. Tags on more than `max_share` of posts (usually the
+    searched tag itself) are left out of pairs and communities. They pair
+    with everything, so they would join every community. Returns:
+
+    * pairs: the most strongly associated significant pairs by normalized
+      PMI, with post count, lift, PMI and the likes of the posts they share.
+      Only pairs with lift >= MIN_PAIR_LIFT that share more posts than
+      independent tags would are kept, at a false discovery rate of
+      PAIR_ALPHA over every pair of graph tags (see cooccurrence_surprise
+      and benjamini_hochberg)
+    * communities: label-propagation clusters of the graph of significant
+      pairs, weighted by posts x NPMI, largest first, with the posts and
+      likes they cover
+    * trending: tags ranked by log(posts) x like-weighted engagement, where
+      engagement is how many times more likes the tag's posts typically get
+      than the average post (geometric means, shrunk towards 1 for rarely
+      seen tags)
+    """
+    hashtags = hashtags.drop_duplicates(["post", "hashtag"])
+    post = hashtags["post"].to_numpy(dtype="int64")
+    codes, names = pd.factorize(hashtags["hashtag"])
+    names = np.asarray(names, dtype=object)
+    likes = np.asarray(likes, dtype="float64")
+    n_posts = len(np.unique(post))
+    empty = {"posts": n_posts, "tags": len(names), "pairs": [], "communities": [], "trending": []}
+    if n_posts < 2 or not len(names):
+        return empty
+
+    doc_freq = np.bincount(codes, minlength=len(names))
+    tag_likes = np.bincount(codes, weights=likes[post], minlength=len(names))
+
+    # Likes are heavy-tailed, so engagement compares geometric means: exp(mean log-likes
+    # of the tag's posts, smoothed towards the overall mean, minus the overall mean)
+    log_likes = np.log1p(likes)
+    overall = log_likes[np.unique(post)].mean()
+    tag_log_likes = np.bincount(codes, weights=log_likes[post], minlength=len(names))
+    engagement = np.exp(
+        (tag_log_likes + ENGAGEMENT_PRIOR_POSTS * overall) / (doc_freq + ENGAGEMENT_PRIOR_POSTS) - overall
+    )
+    score = engagement * np.log1p(doc_freq)
+    common = np.flatnonzero(doc_freq >= min_count)
+    trending = pd.DataFrame({
+        "hashtag": names[common],
+        "posts": doc_freq[common],
+        "likes": tag_likes[common].astype("int64"),
+        "engagement": engagement[common].round(3),
+        "score": score[common].round(3),
+    }).sort_values(["score", "posts"], ascending=False).head(top_n)
+    empty["trending"] = trending.to_dict("records")
+
+    keep = (doc_freq >= min_count) & (doc_freq <= max_share * n_posts)
+    in_graph = keep[codes]
+    if in_graph.sum() < 2:
+        return empty
+    tag_a, tag_b, counts, inverse, pair_posts = _pairs(post[in_graph], codes[in_graph], len(names))
+    pair_likes = np.bincount(inverse, weights=likes[pair_posts], minlength=len(counts))
+
+    expected = doc_freq[tag_a] * doc_freq[tag_b] / n_posts
+    n_tags = int(keep.sum())
+    significant = benjamini_hochberg(cooccurrence_surprise(counts, expected), n_tags * (n_tags - 1) // 2)
+    strong = (counts >= min_pair_count) & significant & (counts >= MIN_PAIR_LIFT * expected)
+    tag_a, tag_b, counts, pair_likes = tag_a[strong], tag_b[strong], counts[strong], pair_likes[strong]
+    lift = counts / expected[strong]
+    pmi = np.log2(lift)
+    # max_share < 1 keeps counts below n_posts, so the normalizer is never zero
+    npmi = pmi / -np.log2(counts / n_posts)
+
+    pairs = pd.DataFrame({
+        "hashtag_a": names[tag_a],
+        "hashtag_b": names[tag_b],
+        "posts": counts,
+        "likes": pair_likes.astype("int64"),
+        "lift": lift.round(3),
+        "pmi": pmi.round(3),
+        "npmi": npmi.round(3),
+    }).sort_values(["npmi", "posts"], ascending=False).head(top_n)
+
+    # Communities over the significant pairs, weighted by how often and how strongly they co-occur
+    labels = label_propagation(len(names), tag_a, tag_b, counts * npmi)
+    members = pd.DataFrame({"post": post[in_graph], "community": labels[codes[in_graph]]})
+    sizes = pd.Series(labels[np.flatnonzero(keep)]).value_counts()
+    members = members[members["community"].isin(sizes.index[sizes > 1])].drop_duplicates()
+    coverage = members.assign(likes=likes[members["post"].to_numpy()]).groupby("community").agg(
+        posts=("post", "size"), likes=("likes", "sum")
+    ).sort_values(["posts", "likes"], ascending=False).head(top_n // 2)
+
+    communities = []
+    for community, row in coverage.iterrows():
+        tags = np.flatnonzero(keep & (labels == community))
+        tags = tags[np.argsort(-doc_freq[tags], kind="stable")]
+        communities.append({
+            "community": len(communities) + 1,
+            "hashtags": names[tags[:8]].tolist(),
+            "size": int(len(tags)),
+            "posts": int(row["posts"]),
+            "likes": int(row["likes"]),
+        })
+
+    return {**empty, "pairs": pairs.to_dict("records"), "communities": communities}
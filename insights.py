@@ -0,0 +1,224 @@
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import Future
+
+import tracing
+from prompt_packing import chunk_by_tokens, count_tokens, dedup_captions, format_hashtag_counts
+
+# Map-reduce rounds before we give up and truncate what's left
+MAX_REDUCE_ROUNDS = 3
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def build_prompts(searched_term):
+    """Return the caption, hashtag and synthesis prompts for a search term"""
+    prompt1 = f'''
+I've collected captions from top-trending Instagram posts related to the keyword: "{searched_term}".
+
+🔍 Please analyze these captions to extract the **underlying trends** in the domain of "{searched_term}". Your goal is not to summarize the captions, but to identify:
+
+* The popular activities, ideas, or content themes people are engaging with
+* What's driving attention and interaction in this space
+* How users are expressing or showcasing "{searched_term}"
+
+🤔 What's trending in the world of "{searched_term}" based on these captions?
+Make the output insightful, engaging, and formatted in en-US English.
+'''
+
+    prompt2 = f'''
+Here is a list of hashtags from top-performing Instagram posts, all related to the keyword: "{searched_term}".
+
+🎯 Analyze these hashtags to identify the **real-world trends** in the domain of "{searched_term}". Focus on:
+
+* Common patterns or subtopics that appear frequently
+* Emerging communities, movements, or events
+* The kind of content these hashtags are attached to
+
+💡 Based on these hashtags, what's trending in the "{searched_term}" space?
+Each line is a hashtag followed by how many of the posts used it.
+'''
+
+    prompt3 = f'''
+I have gathered:
+📄 Captions from trending Instagram posts about "{searched_term}"
+🔖 Hashtags from those same top-performing posts
+
+🔍 Please combine both sources to generate a unified insight report showing **what's actually trending in the domain of "{searched_term}"** on Instagram.
+📢 Final goal: Tell me what's trending in "{searched_term}" *based on real post behavior*, not just the words.
+Make it comprehensive, engaging, and clearly structured in en-US English.
+'''
+
+    return prompt1, prompt2, prompt3
+
+
+def format_clusters(clusters, max_chars=300):
+    """Render caption clusters as prompt blocks: a header, then one block per cluster"""
+    blocks = [
+        f"These captions were grouped into {len(clusters)} clusters of similar posts. Each cluster "
+        "shows how many posts it covers, its key terms and its most representative captions."
+    ]
+    for cluster in clusters:
+        lines = [
+            f"Cluster {cluster['cluster']} · {cluster['size']} posts ({cluster['share']:.0%})"
+            f" · key terms: {', '.join(cluster['terms'])}"
+        ]
+        lines.extend(f"- {' '.join(example.split())[:max_chars]}" for example in cluster["examples"])
+        blocks.append("\n".join(lines))
+    return blocks
+
+
+def build_map_prompt(searched_term):
+    return f'''
+Below is one batch of captions from trending Instagram posts about "{searched_term}".
+Summarize the recurring themes, activities, products, places and tone as a compact bullet list.
+Keep concrete details and note roughly how common each theme is. Skip one-off mentions.
+'''
+
+
+async def _astream(model, prompt, on_text):
+    """Stream a response, passing the text so far to `on_text`; returns the whole message"""
+    from llm_cache import astream_with_cache
+
+    started = time.perf_counter()
+    message = None
+    async for chunk in astream_with_cache(model, prompt):
+        if message is None:
+            tracing.set_attributes(first_token_seconds=round(time.perf_counter() - started, 6))
+            message = chunk
+        else:
+            message = message + chunk
+        on_text(message.content)
+    return message
+
+
+async def _ainvoke(model, prompt, semaphore, timeout, name="llm", on_text=None):
+    with tracing.span(name, prompt_chars=len(prompt)):
+        async with semaphore:
+            with tracing.span("llm.call"):
+                if on_text is None:
+                    response = await asyncio.wait_for(model.ainvoke(prompt), timeout=timeout)
+                else:
+                    response = await asyncio.wait_for(_astream(model, prompt, on_text), timeout=timeout)
+        # Gemini reports token usage per call; a cached response replays the original counts
+        usage = getattr(response, "usage_metadata", None) or {}
+        tracing.set_attributes(
+            input_tokens=usage.get("input_tokens", 0),
+            output_tokens=usage.get("output_tokens", 0),
+            response_chars=len(response.content),
+        )
+    return response.content
+
+
+async def _areduce_captions(model, searched_term, captions, budget, semaphore, timeout):
+    """Shrink captions to fit `budget` tokens by summarizing chunks in parallel"""
+    map_prompt = build_map_prompt(searched_term)
+    texts = captions
+    for _ in range(MAX_REDUCE_ROUNDS):
+        text = "\n".join(texts)
+        if count_tokens(text) <= budget:
+            return text
+        chunks = chunk_by_tokens(texts, budget)
+        if len(chunks) == 1:
+            break
+        texts = await asyncio.gather(*(
+            _ainvoke(model, map_prompt + chunk, semaphore, timeout, name="llm.map") for chunk in chunks
+        ))
+
+    # Still too large (e.g. one enormous caption); keep the head of it
+    return "\n".join(texts)[:budget * 4]
+
+
+async def agenerate_insight(model, searched_term, captions_list, hashtag_counts, clusters=None,
+                            max_concurrency=4, timeout=120, token_budget=8000, on_update=None):
+    """Run the caption and hashtag analyses concurrently, then synthesize them.
+
+    End-to-end latency is roughly max(captions, hashtags) + synthesis instead
+    of the sum of all three calls. `timeout` applies to each model call.
+
+    With `clusters` (see caption_clusters.cluster_captions) the caption
+    analysis reads each cluster's size and representative captions instead
+    of every caption. Otherwise captions are deduplicated. Either way, text
+    still over `token_budget` is summarized chunk by chunk in parallel first.
+    Hashtags are sent as `tag: count` lines, most frequent first.
+
+    With `on_update`, the caption, hashtag and synthesis calls are streamed
+    and `on_update(part, text_so_far)` is called as each one grows, with
+    part being "captions", "hashtags" or "synthesis".
+    """
+    prompt1, prompt2, prompt3 = build_prompts(searched_term)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    def stream_to(part):
+        if on_update is None:
+            return None
+        return lambda text: on_update(part, text)
+
+    async def analyze_captions():
+        with tracing.span("prompt.captions", captions=len(captions_list), clusters=len(clusters or ())):
+            captions = format_clusters(clusters) if clusters else dedup_captions(captions_list)
+            captions_text = await _areduce_captions(
+                model, searched_term, captions, token_budget, semaphore, timeout
+            )
+            tracing.set_attributes(unique_captions=len(captions), prompt_tokens=count_tokens(captions_text))
+        return await _ainvoke(model, prompt1 + captions_text, semaphore, timeout, name="llm.captions",
+                              on_text=stream_to("captions"))
+
+    hashtag_text = format_hashtag_counts(hashtag_counts, max(token_budget // 4, 1))
+    response1, response2 = await asyncio.gather(
+        analyze_captions(),
+        _ainvoke(model, prompt2 + hashtag_text, semaphore, timeout, name="llm.hashtags",
+                 on_text=stream_to("hashtags")),
+    )
+    return await _ainvoke(model, prompt3 + response1 + response2, semaphore, timeout, name="llm.synthesis",
+                          on_text=stream_to("synthesis"))
+
+
+def _insight_loop():
+    """The event loop every insight runs on, started on a daemon thread on first use.
+
+    Async model clients bind to the loop they are first used on (Gemini's
+    gRPC channel does), so a shared model breaks if each call brings its own
+    loop via asyncio.run.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="insight-loop", daemon=True).start()
+    return _loop
+
+
+def run_on_insight_loop(coro):
+    """Run a coroutine on the shared insight loop and block until it finishes.
+
+    The coroutine runs in a copy of the caller's context, so tracing spans
+    nest under the caller's. Callbacks it makes (e.g. on_update) run on the
+    loop thread.
+    """
+    loop = _insight_loop()
+    future = Future()
+
+    def start():
+        task = loop.create_task(coro)
+
+        def done(task):
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+
+        task.add_done_callback(done)
+
+    loop.call_soon_threadsafe(start, context=contextvars.copy_context())
+    return future.result()
+
+
+def generate_insight(model, searched_term, captions_list, hashtag_counts, **kwargs):
+    """Blocking wrapper around agenerate_insight for synchronous callers"""
+    return run_on_insight_loop(agenerate_insight(model, searched_term, captions_list, hashtag_counts, **kwargs))
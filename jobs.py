@@ -0,0 +1,115 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    """One background analysis; `stage` and `partial` are updated while it runs"""
+
+    def __init__(self, job_id, key, meta):
+        self.id = job_id
+        self.key = key
+        self.meta = meta
+        self.status = QUEUED
+        self.stage = "queued"
+        self.partial = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._done = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    def update(self, stage=None, **partial):
+        """Report progress from inside the job function"""
+        if stage is not None:
+            self.stage = stage
+        self.partial.update(partial)
+
+    def wait(self, timeout=None):
+        """Block until the job finishes or `timeout` seconds pass; returns whether it finished"""
+        return self._done.wait(timeout)
+
+    def elapsed(self):
+        end = self.finished_at or time.time()
+        return end - (self.started_at or self.created_at)
+
+
+class JobQueue:
+    """Thread-pool job runner with a job table and coalescing of identical requests.
+
+    Submitting a job whose key matches one that is still queued or running
+    returns the existing job instead of starting a second one, so two users
+    analyzing the same hashtag share a single scrape.
+    """
+
+    def __init__(self, max_workers=4, keep_finished=200, finished_ttl=3600):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis")
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._jobs = {}
+        self._inflight = {}
+        self.keep_finished = keep_finished
+        self.finished_ttl = finished_ttl
+
+    def submit(self, key, fn, *args, meta=None, **kwargs):
+        """Queue `fn(job, *args, **kwargs)` unless a job with `key` is already in flight"""
+        with self._lock:
+            job_id = self._inflight.get(key)
+            if job_id is not None:
+                return self._jobs[job_id]
+
+            job = Job(str(next(self._ids)), key, meta or {})
+            self._jobs[job.id] = job
+            self._inflight[key] = job.id
+            self._prune()
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = RUNNING
+        job.stage = "starting"
+        job.started_at = time.time()
+        result = error = None
+        try:
+            result = fn(job, *args, **kwargs)
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+
+        # Finish under the lock, and flip `status` last, so neither _prune nor a
+        # polling reader sees a finished job without its result and finished_at
+        with self._lock:
+            job.finished_at = time.time()
+            job.result, job.error = result, error
+            job.stage = "done" if error is None else "failed"
+            job.status = DONE if error is None else FAILED
+            if self._inflight.get(job.key) == job.id:
+                del self._inflight[job.key]
+        job._done.set()
+
+    def _prune(self):
+        # Called with the lock held: forget old finished jobs so the table stays bounded
+        now = time.time()
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished),
+            key=lambda job: job.finished_at,
+        )
+        excess = len(finished) - self.keep_finished
+        for i, job in enumerate(finished):
+            if i < excess or now - job.finished_at > self.finished_ttl:
+                del self._jobs[job.id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
@@ -0,0 +1,117 @@
+import hashlib
+import os
+import threading
+import warnings
+
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.caches import BaseCache
+from langchain_core.globals import get_llm_cache, set_llm_cache
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration
+
+import tracing
+from ttl_store import TTLStore
+
+DEFAULT_LLM_CACHE_PATH = os.path.join(".cache", "llm_cache.sqlite3")
+
+# `loads` is flagged as beta but is how LangChain's own persistent caches round-trip generations
+warnings.filterwarnings("ignore", message="The function `loads` is in beta", category=LangChainBetaWarning)
+
+
+class PersistentLLMCache(BaseCache):
+    """LangChain LLM cache persisted to SQLite, with LRU eviction and hit/miss counters.
+
+    Keys hash LangChain's llm_string (model name, temperature and other call
+    parameters) together with the full prompt, so a response is only reused
+    for an identical call. That is only safe for deterministic settings such
+    as temperature=0, which is what the analyzer uses.
+
+    There is no semantic (similar-prompt) reuse: prompts embed the filtered
+    captions and hashtags, so a response to a merely similar prompt would
+    describe different posts.
+    """
+
+    def __init__(self, path=DEFAULT_LLM_CACHE_PATH, ttl=30 * 86400, max_entries=5000,
+                 max_bytes=128 * 1024 * 1024):
+        self._store = TTLStore(path, ttl=ttl, max_entries=max_entries, max_bytes=max_bytes)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(prompt, llm_string):
+        digest = hashlib.sha256()
+        digest.update(llm_string.encode("utf-8"))
+        digest.update(b"\x1e")
+        digest.update(prompt.encode("utf-8"))
+        return digest.hexdigest()
+
+    def lookup(self, prompt, llm_string):
+        value, state = self._store.get(self._key(prompt, llm_string))
+        with self._lock:
+            if state == "fresh":
+                self.hits += 1
+            else:
+                self.misses += 1
+        tracing.add(llm_cache_hits=1 if state == "fresh" else 0, llm_cache_misses=0 if state == "fresh" else 1)
+        if state != "fresh":
+            return None
+        return [loads(generation) for generation in value]
+
+    def update(self, prompt, llm_string, return_val):
+        self._store.set(self._key(prompt, llm_string), [dumps(generation) for generation in return_val])
+
+    def clear(self, **kwargs):
+        self._store.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+def install_llm_cache():
+    """Create the persistent LLM cache from LLM_CACHE_* settings and register it globally"""
+    cache = PersistentLLMCache(
+        path=os.getenv("LLM_CACHE_PATH", DEFAULT_LLM_CACHE_PATH),
+        ttl=int(os.getenv("LLM_CACHE_TTL", 30 * 86400)),
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", 5000)),
+        max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", 128 * 1024 * 1024)),
+    )
+    set_llm_cache(cache)
+    return cache
+
+
+async def astream_with_cache(model, prompt):
+    """Stream message chunks for `prompt`, reading and filling the LLM cache.
+
+    BaseChatModel.astream never consults the LLM cache, so streaming would
+    otherwise pay for every repeated prompt. This looks the prompt up under
+    the same key ainvoke uses; a hit comes back as a single message, and a
+    streamed answer is stored once complete so later calls (streamed or
+    not) reuse it.
+    """
+    cache = model.cache if isinstance(model.cache, BaseCache) else get_llm_cache()
+    if cache is None or model.cache is False:
+        async for chunk in model.astream(prompt):
+            yield chunk
+        return
+
+    key = dumps([HumanMessage(content=prompt)])
+    llm_string = model._get_llm_string()
+    cached = await cache.alookup(key, llm_string)
+    if cached:
+        yield cached[0].message
+        return
+
+    message = None
+    async for chunk in model.astream(prompt):
+        message = chunk if message is None else message + chunk
+        yield chunk
+    if message is not None:
+        final = AIMessage(content=message.content, usage_metadata=message.usage_metadata,
+                          response_metadata=message.response_metadata)
+        await cache.aupdate(key, llm_string, [ChatGeneration(message=final)])
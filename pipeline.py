@@ -0,0 +1,284 @@
+import os
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+
+import tracing
+from caption_clusters import cluster_captions
+from extraction import extract_posts_with_locations, normalize_hashtag
+from insights import generate_insight
+from result_set import ResultSet, build_post_frame, content_hash
+from scrape_cache import make_cache_key
+
+
+GEMINI_MODEL = "gemini-2.0-flash"
+
+
+def get_api_token():
+    token = os.getenv("API_TOKEN")
+    if not token:
+        raise RuntimeError("API_TOKEN is not set; add it to the environment or a .env file")
+    return token
+
+
+# Clients, caches and the model are created on first use so importing this
+# module stays cheap (no LangChain import until an insight is needed).
+
+@lru_cache(maxsize=1)
+def get_llm_cache():
+    from llm_cache import install_llm_cache
+    return install_llm_cache()
+
+
+@lru_cache(maxsize=1)
+def get_model():
+    """Gemini chat model behind the persistent LLM cache"""
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    get_llm_cache()
+    return ChatGoogleGenerativeAI(model=GEMINI_MODEL, temperature=0)
+
+
+@lru_cache(maxsize=1)
+def get_apify_client():
+    from apify_api import client_from_env
+    return client_from_env(get_api_token())
+
+
+@lru_cache(maxsize=1)
+def get_scrape_cache():
+    from scrape_cache import cache_from_env
+    return cache_from_env()
+
+
+@lru_cache(maxsize=1)
+def get_trend_store():
+    from trend_store import store_from_env
+    return store_from_env()
+
+
+def scrape_options_from_env():
+    return {
+        "deadline": int(os.getenv("APIFY_RUN_DEADLINE", 900)),
+        "page_size": int(os.getenv("APIFY_PAGE_SIZE", 20)),
+    }
+
+
+def insight_options_from_env():
+    return {
+        "max_concurrency": int(os.getenv("INSIGHT_CONCURRENCY", 4)),
+        "timeout": float(os.getenv("INSIGHT_TIMEOUT", 120)),
+        "token_budget": int(os.getenv("PROMPT_TOKEN_BUDGET", 8000)),
+    }
+
+
+def cluster_options_from_env():
+    return {
+        "max_clusters": int(os.getenv("CAPTION_CLUSTERS", 12)),
+        "examples": int(os.getenv("CAPTION_CLUSTER_EXAMPLES", 3)),
+        "min_captions": int(os.getenv("CAPTION_CLUSTER_MIN", 60)),
+    }
+
+
+def build_payload(searched_term, newer_than=None):
+    payload = {
+        "addParentData": False,
+        "enhanceUserSearchWithFacebookPage": False,
+        "isUserReelFeedURL": False,
+        "isUserTaggedFeedURL": False,
+        "resultsLimit": 200,  # Increased to get more results
+        "resultsType": "details",
+        # Instagram hashtags are case-insensitive; one spelling keeps cache keys and runs shared
+        "search": normalize_hashtag(searched_term),
+        "searchLimit": 5,  # Increased to get more results
+        "searchType": "hashtag"
+    }
+    if newer_than:
+        # Delta scrape: Apify skips posts older than this timestamp
+        payload["onlyPostsNewerThan"] = newer_than
+    return payload
+
+
+def _timed_items(items, stats):
+    """Pass items through, adding the time spent waiting on the source to `stats`"""
+    items = iter(items)
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(items)
+        except StopIteration:
+            return
+        finally:
+            stats["download_seconds"] += time.perf_counter() - started
+        stats["items"] += 1
+        yield item
+
+
+def scrape_posts(payload, client, deadline=900, page_size=20):
+    """Run the scraper and extract posts page by page as the dataset streams in.
+
+    `scraped_at` is when the run was started, so a cached copy still records
+    how old its posts are and the next delta scrape doesn't skip any.
+    """
+    scraped_at = time.time()
+    items = client.scrape_items(payload, deadline=deadline, page_size=page_size)
+    with tracing.span("apify.dataset"):
+        # Pages download while we extract, so split the wall time between the two
+        stats = {"items": 0, "download_seconds": 0.0}
+        started = time.perf_counter()
+        posts, locations = extract_posts_with_locations(_timed_items(items, stats))
+        tracing.set_attributes(
+            items=stats["items"],
+            posts=len(posts),
+            download_seconds=round(stats["download_seconds"], 6),
+            extract_seconds=round(time.perf_counter() - started - stats["download_seconds"], 6),
+        )
+    return {"posts": posts, "locations": locations, "scraped_at": scraped_at}
+
+
+def load_result_set(searched_term, client, cache=None, **scrape_options):
+    """Scrape (or load from cache) a hashtag and index its posts by likes"""
+    payload = build_payload(searched_term)
+
+    def fetch():
+        return scrape_posts(payload, client, **scrape_options)
+
+    with tracing.span("scrape", hashtag=searched_term):
+        if cache is None:
+            scraped, state = fetch(), "off"
+        else:
+            key = make_cache_key(payload["search"], payload, namespace="posts")
+            # An empty scrape is usually a failed or blocked run; retry it next time
+            scraped, state = cache.get_or_fetch(key, fetch, worth_caching=lambda value: value["posts"])
+        tracing.set_attributes(cache=state, posts=len(scraped["posts"]))
+    with tracing.span("index"):
+        return ResultSet(searched_term, scraped["posts"], scraped["locations"], scraped.get("scraped_at"))
+
+
+def analyze_result_set(result_set, model, min_likes=0, insight_cache=None, cluster_options=None,
+                       **insight_options):
+    """Filter an already scraped result set and attach caption clusters, the hashtag graph and the LLM insight.
+
+    The insight is only regenerated when the filtered captions/hashtags differ
+    from a previous run, so slider moves that keep the same posts are free.
+    Clustering settings default to cluster_options_from_env().
+    """
+    with tracing.span("filter", min_likes=min_likes):
+        result = result_set.view(min_likes)
+        tracing.set_attributes(posts=len(result["url_list"]), captions=len(result["captions"]),
+                               hashtags=len(result["hashtag_counts"]))
+
+    with tracing.span("cluster"):
+        result["clusters"] = cluster_captions(
+            result["captions"], **(cluster_options_from_env() if cluster_options is None else cluster_options)
+        )
+        tracing.set_attributes(clusters=len(result["clusters"]))
+
+    with tracing.span("hashtag_graph"):
+        result["hashtag_graph"] = result_set.hashtag_graph(min_likes)
+        tracing.set_attributes(pairs=len(result["hashtag_graph"]["pairs"]),
+                               communities=len(result["hashtag_graph"]["communities"]))
+
+    if insight_cache is None:
+        insight_cache = {}
+    key = content_hash([result["searched_term"]], result["captions"], result["hashtags"])
+    with tracing.span("insight", cached=key in insight_cache):
+        if key not in insight_cache:
+            insight_cache[key] = generate_insight(
+                model, result["searched_term"], result["captions"], result["hashtag_counts"],
+                clusters=result["clusters"], **insight_options
+            )
+    result["insight"] = insight_cache[key]
+    return result
+
+
+def track_hashtag(searched_term, client, store, deadline=900, page_size=20):
+    """Scrape only posts newer than the last snapshot and record them in the trend store"""
+    last = store.last_snapshot_time(searched_term)
+    newer_than = None
+    if last:
+        newer_than = datetime.fromtimestamp(last, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+
+    with tracing.trace("track", hashtag=searched_term, newer_than=newer_than):
+        scraped = scrape_posts(build_payload(searched_term, newer_than), client, deadline, page_size)
+        snapshot_id, new_posts = store.ingest(
+            searched_term, build_post_frame(scraped["posts"]), taken_at=scraped["scraped_at"], delta=bool(newer_than)
+        )
+    return {
+        "snapshot_id": snapshot_id,
+        "scraped_posts": len(scraped["posts"]),
+        "new_posts": new_posts,
+        "changes": store.changes_since_last(searched_term),
+    }
+
+
+def _stream_insight_to(job):
+    """on_update callback publishing streamed insight parts on a job"""
+    def on_update(part, text):
+        # Swap in a new dict so readers never see one being mutated
+        parts = {**job.partial.get("insight_parts", {}), part: text}
+        job.update(stage="writing report" if part == "synthesis" else None, insight_parts=parts)
+    return on_update
+
+
+def run_analysis_job(job, searched_term, client, model, min_likes=0, cache=None,
+                     scrape_options=None, insight_options=None, store=None):
+    """JobQueue body: scrape, publish a preview of the posts, then add the insight.
+
+    While the insight is generated, `job.partial["insight_parts"]` holds the
+    caption/hashtag analyses and the synthesis as far as they have streamed.
+    The returned `trace` holds the timings of every stage (see tracing.py).
+    """
+    with tracing.trace("analysis", hashtag=searched_term, min_likes=min_likes, job_id=job.id) as trace:
+        job.update(stage="scraping")
+        result_set = load_result_set(searched_term, client, cache, **(scrape_options or {}))
+        if store is not None:
+            store.ingest(searched_term, result_set.posts, taken_at=result_set.scraped_at)
+
+        job.update(stage="generating insights", preview=result_set.view(min_likes))
+        result = analyze_result_set(
+            result_set, model, min_likes, on_update=_stream_insight_to(job), **(insight_options or {})
+        )
+    return {"result_set": result_set, "result": result, "trace": trace.to_dict()}
+
+
+def run_refilter_job(job, result_set, model, min_likes=0, insight_cache=None, insight_options=None):
+    """JobQueue body: re-filter an already scraped result set and regenerate its insight.
+
+    Returns the same shape as run_analysis_job, streaming the insight into
+    `job.partial["insight_parts"]` the same way.
+    """
+    with tracing.trace("refilter", hashtag=result_set.searched_term, min_likes=min_likes, job_id=job.id) as trace:
+        job.update(stage="generating insights", preview=result_set.view(min_likes))
+        result = analyze_result_set(
+            result_set, model, min_likes, insight_cache, on_update=_stream_insight_to(job), **(insight_options or {})
+        )
+    return {"result_set": result_set, "result": result, "trace": trace.to_dict()}
+
+
+def run_analysis(searched_term, min_likes=0, client=None, model=None, cache=None, store=None,
+                 insight=True, insight_cache=None):
+    """Headless analysis of one hashtag, returning a JSON-serializable result.
+
+    Any of the Apify client, model, scrape cache or trend store can be
+    injected; missing ones are built lazily from the environment. Pass
+    `cache=False` / `store=False` to skip caching or snapshot recording,
+    and `insight=False` to skip the LLM calls entirely. Stage timings are
+    returned under `trace`.
+    """
+    client = client or get_apify_client()
+    cache = get_scrape_cache() if cache is None else cache or None
+    store = get_trend_store() if store is None else store or None
+
+    with tracing.trace("analysis", hashtag=searched_term, min_likes=min_likes) as trace:
+        result_set = load_result_set(searched_term, client, cache, **scrape_options_from_env())
+        if store is not None:
+            store.ingest(searched_term, result_set.posts, taken_at=result_set.scraped_at)
+        if insight:
+            result = analyze_result_set(
+                result_set, model or get_model(), min_likes, insight_cache, **insight_options_from_env()
+            )
+        else:
+            result = result_set.view(min_likes)
+    result["trace"] = trace.to_dict()
+    return result
@@ -0,0 +1,80 @@
+import re
+from functools import lru_cache
+
+URL_RE = re.compile(r"https?://\S+|www\.\S+")
+TAG_RE = re.compile(r"[#@]\w+")
+NON_WORD_RE = re.compile(r"[\W_]+")
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    # tiktoken downloads its BPE tables on first use; without network we fall
+    # back to the usual ~4 characters per token estimate.
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text):
+    """Approximate prompt size in tokens"""
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def caption_fingerprint(caption):
+    """Normalize a caption so reposts differing only in tags, links, emoji or casing collide"""
+    text = URL_RE.sub(" ", caption)
+    text = TAG_RE.sub(" ", text)
+    text = NON_WORD_RE.sub(" ", text.casefold())
+    return " ".join(text.split())
+
+
+def dedup_captions(captions):
+    """Drop exact and near-duplicate captions, keeping the first (most liked) copy"""
+    seen = set()
+    unique = []
+    for caption in captions:
+        key = caption_fingerprint(caption) or caption.strip()
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(caption.strip())
+    return unique
+
+
+def format_hashtag_counts(hashtag_counts, budget):
+    """Render `tag: count` lines, most frequent first, up to `budget` tokens"""
+    lines = []
+    used = 0
+    for tag, count in hashtag_counts.items():
+        line = f"{tag}: {count}"
+        cost = count_tokens(line) + 1
+        if used + cost > budget:
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
+
+
+def chunk_by_tokens(texts, budget):
+    """Group texts into newline-joined chunks of at most `budget` tokens each.
+
+    A single text longer than the budget gets a chunk of its own.
+    """
+    chunks = []
+    current = []
+    used = 0
+    for text in texts:
+        cost = count_tokens(text) + 1
+        if current and used + cost > budget:
+            chunks.append("\n".join(current))
+            current = []
+            used = 0
+        current.append(text)
+        used += cost
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
@@ -0,0 +1,117 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from hashtag_graph import hashtag_graph
+
+POST_COLUMNS = ["location", "url", "caption", "hashtags", "thumbnail", "likes"]
+TEXT_COLUMNS = ["location", "url", "caption", "thumbnail"]
+
+
+def content_hash(*parts):
+    """Stable hash over lists of strings, used to skip repeated insight generation"""
+    digest = hashlib.sha256()
+    for part in parts:
+        for value in part:
+            digest.update(str(value).encode("utf-8"))
+            digest.update(b"\x1f")
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+def build_post_frame(posts):
+    """Normalize extracted post dicts into a columnar table, most liked first"""
+    frame = pd.DataFrame.from_records(posts, columns=POST_COLUMNS)
+    frame["likes"] = pd.to_numeric(frame["likes"], errors="coerce").fillna(0).astype("int64")
+    frame["hashtags"] = [tags if isinstance(tags, list) else [] for tags in frame["hashtags"]]
+    for column in TEXT_COLUMNS:
+        frame[column] = frame[column].astype("string[pyarrow]")
+    frame[["url", "caption", "thumbnail"]] = frame[["url", "caption", "thumbnail"]].fillna("")
+
+    # Stable sort keeps scrape order between posts with equal likes
+    frame = frame.sort_values("likes", ascending=False, kind="mergesort", ignore_index=True)
+    return frame
+
+
+def build_hashtag_frame(frame):
+    """Explode per-post hashtag lists into a long (post, hashtag) table"""
+    tags = frame["hashtags"].explode().dropna()
+    return pd.DataFrame({
+        "post": tags.index.to_numpy(dtype="int64"),
+        "hashtag": tags.astype("string[pyarrow]").to_numpy(),
+    })
+
+
+class ResultSet:
+    """Extracted posts for one scrape, held as a likes-sorted columnar table.
+
+    Because rows are ordered by likes, a minimum-likes filter is a
+    searchsorted on the likes column and a prefix slice, and hashtags live in
+    a long-format table so counting them is a value_counts over that prefix.
+    `scraped_at` is when the posts were scraped, if known.
+    """
+
+    def __init__(self, searched_term, posts, locations, scraped_at=None):
+        self.searched_term = searched_term
+        self.locations = locations
+        self.scraped_at = scraped_at
+        self.posts = build_post_frame(posts)
+        self.hashtags = build_hashtag_frame(self.posts)
+        self._neg_likes = -self.posts["likes"].to_numpy()
+
+    def __len__(self):
+        return len(self.posts)
+
+    def filter_count(self, min_likes):
+        """Number of leading rows with at least `min_likes` likes"""
+        count = int(np.searchsorted(self._neg_likes, -min_likes, side="right"))
+
+        # If no posts match our filter, fall back to all posts
+        return count or len(self.posts)
+
+    def filter_by_likes(self, min_likes):
+        """Posts with at least `min_likes` likes, most likes first"""
+        return self.posts.iloc[:self.filter_count(min_likes)]
+
+    def _hashtag_end(self, count):
+        """Rows of the hashtag table that belong to the first `count` posts"""
+        return int(np.searchsorted(self.hashtags["post"].to_numpy(), count, side="left"))
+
+    def filtered_hashtags(self, min_likes=0):
+        """Hashtag occurrences on the filtered posts, in post order"""
+        return self.hashtags["hashtag"].iloc[:self._hashtag_end(self.filter_count(min_likes))]
+
+    def hashtag_graph(self, min_likes=0, **options):
+        """Co-occurrence pairs, communities and trend scores of the filtered posts' hashtags"""
+        count = self.filter_count(min_likes)
+        return hashtag_graph(
+            self.hashtags.iloc[:self._hashtag_end(count)], self.posts["likes"].to_numpy()[:count], **options
+        )
+
+    def view(self, min_likes=0):
+        """Build the captions/hashtags/display data for a likes threshold"""
+        posts = self.filter_by_likes(min_likes)
+        has_caption = posts["caption"] != ""
+        has_url = posts["url"] != ""
+
+        hashtags = self.filtered_hashtags(min_likes)
+        hashtag_counts = hashtags.value_counts(sort=True)
+
+        # Enhanced posts for visualization with thumbnails and URLs
+        display = posts.loc[has_url & has_caption, ["url", "caption", "thumbnail", "location", "likes"]]
+        display = display.astype({"location": object}).fillna({"location": "Unknown"})
+
+        # Generate hashtag string for wordcloud
+        hashtag_string = " ".join(hashtag_counts.index[:15])
+
+        return {
+            "searched_term": self.searched_term,
+            "captions": posts.loc[has_caption, "caption"].tolist(),
+            "hashtags": hashtags.tolist(),
+            "hashtag_counts": hashtag_counts.to_dict(),
+            "locations": self.locations,
+            "hashtag_string": hashtag_string,
+            "post_display_data": display.to_dict("records"),
+            "url_list": posts.loc[has_url, "url"].tolist()
+        }
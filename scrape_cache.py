@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import threading
+
+from ttl_store import TTLStore
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "scrape_cache.sqlite3")
+
+
+def make_cache_key(searched_term, payload, namespace="items"):
+    """Hash the search term and the full run payload into a stable cache key.
+
+    `namespace` separates differently shaped values stored for the same run.
+    Normalize the term before building the payload (see
+    pipeline.build_payload) so both agree on its spelling.
+    """
+    raw = json.dumps(
+        {"namespace": namespace, "search": searched_term, "payload": payload},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ScrapeCache(TTLStore):
+    """Cache for scrape results with TTL, LRU eviction and stale-while-revalidate.
+
+    Entries younger than `ttl` seconds are fresh. Entries older than that but
+    younger than `ttl + stale_ttl` are served immediately while a background
+    refresh replaces them. Anything older is treated as a miss.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=3600, stale_ttl=86400,
+                 max_entries=500, max_bytes=256 * 1024 * 1024):
+        super().__init__(path, ttl, stale_ttl, max_entries, max_bytes)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+
+    def get_or_fetch(self, key, fetch, worth_caching=bool):
+        """Serve from cache when possible, otherwise call `fetch()` and store the result.
+
+        Returns (value, state) with state as in get(). Stale entries are
+        returned straight away and refreshed on a background thread. Results
+        for which `worth_caching(value)` is false (by default, empty ones) are
+        not stored, so a failed run is retried next time.
+        """
+        value, state = self.get(key)
+        if state == "fresh":
+            return value, state
+        if state == "stale":
+            self._refresh_in_background(key, fetch, worth_caching)
+            return value, state
+
+        value = fetch()
+        if worth_caching(value):
+            self.set(key, value)
+        return value, state
+
+    def _refresh_in_background(self, key, fetch, worth_caching=bool):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                # A refresh that finished after our stale read has already replaced the entry
+                if self.get(key)[1] == "fresh":
+                    return
+                value = fetch()
+                if worth_caching(value):
+                    self.set(key, value)
+            except Exception:
+                # Keep serving the stale copy; the next lookup will try again.
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+def cache_from_env():
+    """Build a ScrapeCache configured from SCRAPE_CACHE_* environment variables"""
+    return ScrapeCache(
+        path=os.getenv("SCRAPE_CACHE_PATH", DEFAULT_CACHE_PATH),
+        ttl=int(os.getenv("SCRAPE_CACHE_TTL", 3600)),
+        stale_ttl=int(os.getenv("SCRAPE_CACHE_STALE_TTL", 86400)),
+        max_entries=int(os.getenv("SCRAPE_CACHE_MAX_ENTRIES", 500)),
+        max_bytes=int(os.getenv("SCRAPE_CACHE_MAX_BYTES", 256 * 1024 * 1024)),
+    )
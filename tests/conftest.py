@@ -0,0 +1,71 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Replies from the server's scripted routes and records every request"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        self.server.requests.append({
+            "method": self.command,
+            "path": url.path,
+            "query": {key: values[-1] for key, values in parse_qs(url.query).items()},
+            "body": json.loads(body) if body else None,
+        })
+
+        # Each route is a list of (status, body, headers); the last one repeats
+        replies = self.server.routes.get((self.command, url.path))
+        if not replies:
+            status, payload, headers = 404, {"error": "not found"}, {}
+        else:
+            status, payload, headers = replies.pop(0) if len(replies) > 1 else replies[0]
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = _reply
+
+
+@pytest.fixture
+def apify_stub():
+    """Local HTTP server standing in for the Apify API"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.routes = {}
+    server.requests = []
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def apify_client(apify_stub):
+    from apify_api import ApifyClient
+
+    client = ApifyClient("token", base_url=apify_stub.url, timeout=(2, 5), backoff=0.01, max_retries=2)
+    yield client
+    client.close()
@@ -0,0 +1,60 @@
+import time
+
+import pytest
+import requests
+
+START_PATH = "/acts/apify~instagram-scraper/runs"
+ITEMS_PATH = "/datasets/ds1/items"
+
+
+def test_429_honours_retry_after(apify_stub, apify_client):
+    apify_stub.routes[("GET", ITEMS_PATH)] = [(429, {}, {"Retry-After": "0.3"}), (200, [{"id": 1}], {})]
+
+    started = time.monotonic()
+    assert list(apify_client.iter_dataset_items("ds1")) == [{"id": 1}]
+    assert time.monotonic() - started >= 0.3
+    assert len(apify_stub.requests) == 2
+
+
+def test_5xx_is_retried_on_get(apify_stub, apify_client):
+    apify_stub.routes[("GET", ITEMS_PATH)] = [(503, {}, {}), (502, {}, {}), (200, [{"id": 1}, {"id": 2}], {})]
+
+    assert list(apify_client.iter_dataset_items("ds1")) == [{"id": 1}, {"id": 2}]
+    assert len(apify_stub.requests) == 3
+
+
+def test_5xx_is_not_retried_on_run_start(apify_stub, apify_client):
+    apify_stub.routes[("POST", START_PATH)] = [(500, {}, {}), (201, {"data": {"id": "run1"}}, {})]
+
+    with pytest.raises(requests.HTTPError):
+        apify_client.start_run({"search": "fashion"})
+    assert len(apify_stub.requests) == 1
+
+
+def test_429_is_retried_on_run_start(apify_stub, apify_client):
+    apify_stub.routes[("POST", START_PATH)] = [(429, {}, {"Retry-After": "0"}), (201, {"data": {"id": "run1"}}, {})]
+
+    assert apify_client.start_run({"search": "fashion"})["id"] == "run1"
+    assert len(apify_stub.requests) == 2
+
+
+def test_retries_are_exhausted(apify_stub, apify_client):
+    apify_stub.routes[("GET", ITEMS_PATH)] = [(503, {}, {})]
+
+    with pytest.raises(requests.HTTPError):
+        list(apify_client.iter_dataset_items("ds1"))
+    assert len(apify_stub.requests) == apify_client.max_retries + 1
+
+
+def test_hooks_fire_once_per_attempt(apify_stub, apify_client):
+    seen = []
+    apify_client.hooks.append(seen.append)
+    apify_stub.routes[("GET", ITEMS_PATH)] = [(503, {}, {}), (200, [{"id": 1}], {})]
+
+    list(apify_client.iter_dataset_items("ds1"))
+
+    assert [(info["method"], info["path"], info["status"], info["attempt"]) for info in seen] == [
+        ("GET", ITEMS_PATH, 503, 0),
+        ("GET", ITEMS_PATH, 200, 1),
+    ]
+    assert seen[1]["bytes"] == len(b'[{"id": 1}]')
@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from apify_api import ApifyRunError
+
+RUN_PATH = "/actor-runs/run1"
+
+
+def run(status):
+    return {"data": {"id": "run1", "status": status, "defaultDatasetId": "ds1"}}
+
+
+def test_wait_for_run_long_polls_until_succeeded(apify_stub, apify_client):
+    apify_stub.routes[("GET", RUN_PATH)] = [(200, run("RUNNING"), {}), (200, run("SUCCEEDED"), {})]
+
+    finished = apify_client.wait_for_run(run("READY")["data"], initial_delay=0.01)
+
+    assert finished["status"] == "SUCCEEDED"
+    assert [request["query"]["waitForFinish"] for request in apify_stub.requests] == ["60", "60"]
+
+
+def test_run_start_returns_finished_run(apify_stub, apify_client):
+    apify_stub.routes[("POST", "/acts/apify~instagram-scraper/runs")] = [(201, run("SUCCEEDED"), {})]
+
+    started = apify_client.start_run({"search": "fashion"}, wait_for_finish=120)
+
+    assert started["status"] == "SUCCEEDED"
+    assert apify_stub.requests[0]["query"]["waitForFinish"] == "60"
+    assert apify_stub.requests[0]["body"] == {"search": "fashion"}
+
+
+@pytest.mark.parametrize("status", ["FAILED", "ABORTED", "TIMED-OUT"])
+def test_wait_for_run_raises_on_failed_runs(apify_stub, apify_client, status):
+    apify_stub.routes[("GET", RUN_PATH)] = [(200, run(status), {})]
+
+    with pytest.raises(ApifyRunError, match=status) as error:
+        apify_client.wait_for_run(run("RUNNING")["data"])
+    assert error.value.run["status"] == status
+
+
+def test_wait_for_run_gives_up_at_deadline(apify_stub, apify_client):
+    apify_stub.routes[("GET", RUN_PATH)] = [(200, run("RUNNING"), {})]
+
+    started = time.monotonic()
+    with pytest.raises(ApifyRunError, match="did not finish"):
+        apify_client.wait_for_run(run("RUNNING")["data"], deadline=0.5, initial_delay=0.05)
+    assert time.monotonic() - started < 2
+    assert len(apify_stub.requests) > 1
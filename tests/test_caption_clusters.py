@@ -0,0 +1,82 @@
+import random
+
+from caption_clusters import cluster_captions
+
+TOPICS = {
+    "food": ["pizza", "pasta", "burger", "ramen", "tacos", "brunch", "dessert", "recipe"],
+    "travel": ["beach", "mountain", "flight", "hotel", "passport", "island", "roadtrip", "sunset"],
+    "fitness": ["workout", "squats", "cardio", "protein", "gym", "yoga", "running", "deadlift"],
+}
+
+
+def planted_captions(per_topic=40, seed=1):
+    rng = random.Random(seed)
+    captions = []
+    for topic, words in TOPICS.items():
+        distinct = set()
+        while len(distinct) < per_topic:
+            caption = " ".join(rng.sample(words, 4)) + f" #{topic}"
+            if caption not in distinct:
+                distinct.add(caption)
+                captions.append(caption)
+    return captions
+
+
+def topic_of(caption):
+    return caption.split("#")[1].split()[0]
+
+
+def test_planted_topics_cluster_apart():
+    captions = planted_captions()
+    clusters = cluster_captions(captions, max_clusters=3)
+
+    assert [cluster["size"] for cluster in clusters] == [40, 40, 40]
+    assert [cluster["cluster"] for cluster in clusters] == [1, 2, 3]
+    found = set()
+    for cluster in clusters:
+        topics = {topic_of(example) for example in cluster["examples"]}
+        assert len(topics) == 1
+        topic = topics.pop()
+        assert set(cluster["terms"]) <= set(TOPICS[topic]) | {topic}
+        found.add(topic)
+    assert found == set(TOPICS)
+
+
+def test_more_clusters_than_topics_never_mix_topics():
+    captions = planted_captions()
+    clusters = cluster_captions(captions)
+
+    assert sum(cluster["size"] for cluster in clusters) == len(captions)
+    for cluster in clusters:
+        assert len({topic_of(example) for example in cluster["examples"]}) == 1
+
+
+def test_clusters_are_deterministic_across_runs():
+    captions = planted_captions()
+    assert cluster_captions(captions) == cluster_captions(list(captions))
+    assert cluster_captions(captions, seed=3) == cluster_captions(captions, seed=3)
+
+
+def test_duplicates_count_towards_cluster_size():
+    captions = planted_captions()
+    reposts = ["PIZZA pasta burger ramen #food repost!! https://example.com/p/1"] * 20
+    clusters = cluster_captions(captions + reposts, max_clusters=3)
+
+    assert sum(cluster["size"] for cluster in clusters) == len(captions) + 20
+    food = next(cluster for cluster in clusters if topic_of(cluster["examples"][0]) == "food")
+    assert food["size"] == 60
+    assert food["share"] == round(60 / 140, 4)
+    assert clusters[0] is food
+
+
+def test_too_few_distinct_captions_skip_clustering():
+    captions = planted_captions(per_topic=10)
+    assert cluster_captions(captions) == []
+    assert cluster_captions(captions * 10) == []
+    assert cluster_captions(captions, min_captions=30) != []
+
+
+def test_max_clusters_zero_disables_clustering():
+    captions = planted_captions()
+    assert cluster_captions(captions, max_clusters=0) == []
+    assert cluster_captions([]) == []
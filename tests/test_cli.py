@@ -0,0 +1,54 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import cli
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), cli.AnalysisHandler)
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def fetch(url, body=None):
+    data = None if body is None else body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data)) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_invalid_parameters_are_bad_requests(server):
+    assert fetch(f"{server.url}/analyze")[0] == 400
+    assert fetch(f"{server.url}/analyze?hashtag=fashion&min_likes=lots")[0] == 400
+    assert fetch(f"{server.url}/changes")[0] == 400
+    assert fetch(f"{server.url}/batch", b"{not json")[0] == 400
+    assert fetch(f"{server.url}/batch", {"hashtags": "fashion"})[0] == 400
+
+
+def test_pipeline_errors_are_upstream_failures(server, monkeypatch):
+    def analyze(hashtag, **options):
+        return {}["defaultDatasetId"]
+
+    monkeypatch.setattr(cli, "analyze", analyze)
+    status, body = fetch(f"{server.url}/analyze?hashtag=fashion")
+    assert status == 502
+    assert "defaultDatasetId" in body["error"]
+
+
+def test_valid_requests_reach_the_route(server, monkeypatch):
+    calls = []
+    monkeypatch.setattr(cli, "batch", lambda **params: calls.append(params) or {"ok": True})
+
+    assert fetch(f"{server.url}/batch", {"hashtags": ["a", "b"], "min_likes": "5"}) == (200, {"ok": True})
+    assert calls == [{"hashtags": ["a", "b"], "min_likes": 5, "concurrency": None, "insights": False}]
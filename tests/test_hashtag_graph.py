@@ -0,0 +1,117 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from hashtag_graph import benjamini_hochberg, cooccurrence_surprise, hashtag_graph, label_propagation
+
+
+def hashtag_table(post_tags):
+    rows = [(post, tag) for post, tags in enumerate(post_tags) for tag in tags]
+    return pd.DataFrame(rows, columns=["post", "hashtag"])
+
+
+def independent_posts(n_posts=1000, n_tags=300, per_post=5, seed=0):
+    """Every post draws its tags from one Zipf-like distribution, ignoring the others"""
+    rng = np.random.default_rng(seed)
+    weights = 1 / np.arange(1, n_tags + 1)
+    weights /= weights.sum()
+    return [["searched"] + [f"t{tag}" for tag in rng.choice(n_tags, per_post, replace=False, p=weights)]
+            for _ in range(n_posts)]
+
+
+def planted_posts(n_posts=400, topics=2, topic_tags=6, per_post=4, seed=0):
+    """Each post uses `per_post` of its topic's tags plus one random noise tag"""
+    rng = np.random.default_rng(seed)
+    return [["searched"]
+            + [f"k{post % topics}_{tag}" for tag in rng.choice(topic_tags, per_post, replace=False)]
+            + [f"noise{rng.integers(300)}"]
+            for post in range(n_posts)]
+
+
+def topic_sets(graph):
+    return sorted(sorted(community["hashtags"]) for community in graph["communities"])
+
+
+def test_independent_tags_have_no_pairs_or_communities():
+    for seed in range(3):
+        graph = hashtag_graph(hashtag_table(independent_posts(seed=seed)), np.zeros(1000))
+        assert graph["pairs"] == []
+        assert graph["communities"] == []
+        assert graph["trending"]
+
+
+def test_planted_topics_are_recovered():
+    for topics in (2, 3):
+        graph = hashtag_graph(hashtag_table(planted_posts(n_posts=200 * topics, topics=topics)), np.zeros(200 * topics))
+        assert topic_sets(graph) == [sorted(f"k{topic}_{tag}" for tag in range(6)) for topic in range(topics)]
+        assert all(pair["hashtag_a"][:2] == pair["hashtag_b"][:2] for pair in graph["pairs"])
+        assert [community["posts"] for community in graph["communities"]] == [200] * topics
+
+
+def test_coincidences_between_rare_tags_are_not_pairs():
+    posts = independent_posts()
+    # Two rare tags that happen to share two posts: a lift in the hundreds, but chance
+    posts[0] += ["rare_a", "rare_b"]
+    posts[1] += ["rare_a", "rare_b"]
+    posts[2] += ["rare_a"]
+    graph = hashtag_graph(hashtag_table(posts), np.zeros(1000))
+    assert graph["pairs"] == []
+
+    # Always together on twelve posts is not chance
+    for post in range(3, 15):
+        posts[post] += ["rare_a", "rare_b"]
+    graph = hashtag_graph(hashtag_table(posts), np.zeros(1000))
+    assert [(pair["hashtag_a"], pair["hashtag_b"], pair["posts"]) for pair in graph["pairs"]] == [
+        ("rare_a", "rare_b", 14)
+    ]
+    assert topic_sets(graph) == [["rare_a", "rare_b"]]
+
+
+def test_surprise_matches_the_poisson_tail():
+    for c, e in [(2, 0.004), (5, 1.0), (30, 10.0), (80, 44.0)]:
+        tail = sum(math.exp(j * math.log(e) - e - math.lgamma(j + 1)) for j in range(c, c + 300))
+        # A bound on the tail, so never more surprising than the exact value
+        assert -math.log(tail) - 0.05 <= cooccurrence_surprise(c, e) <= -math.log(tail)
+    assert cooccurrence_surprise([1, 3], [2, 3]).tolist() == [0.0, 0.0]
+
+
+def test_benjamini_hochberg_steps_up():
+    # p = 0.03 misses its own rank's cutoff (2/4 x 0.05) but passes with the next one
+    surprise = -np.log([0.001, 0.03, 0.035, 0.5])
+    assert benjamini_hochberg(surprise, 4, alpha=0.05).tolist() == [True, True, True, False]
+    assert benjamini_hochberg(surprise, 100, alpha=0.05).tolist() == [False, False, False, False]
+    assert benjamini_hochberg([], 10).tolist() == []
+
+
+def clique(nodes):
+    a, b = np.triu_indices(len(nodes), 1)
+    return np.asarray(nodes)[a], np.asarray(nodes)[b]
+
+
+def test_label_propagation_keeps_cliques_whole():
+    src, dst = clique(range(4))
+    assert len(set(label_propagation(4, src, dst, np.ones(len(src))).tolist())) == 1
+
+    # Two 4-cliques joined by one weak edge
+    (a_src, a_dst), (b_src, b_dst) = clique(range(4)), clique(range(4, 8))
+    src, dst = np.r_[a_src, b_src, 3], np.r_[a_dst, b_dst, 4]
+    labels = label_propagation(8, src, dst, np.r_[np.ones(12), 0.5])
+    assert len(set(labels[:4].tolist())) == len(set(labels[4:].tolist())) == 1
+    assert labels[0] != labels[4]
+
+
+def test_label_propagation_on_chains_converges_to_contiguous_runs():
+    for n in (2, 3, 5, 8, 13):
+        src, dst = np.arange(n - 1), np.arange(1, n)
+        labels = label_propagation(n, src, dst, np.ones(n - 1))
+        runs = [label for i, label in enumerate(labels) if i == 0 or label != labels[i - 1]]
+        assert len(runs) == len(set(runs))
+        assert len(runs) <= max(1, n // 2)
+        # A fixed point: one more pass changes nothing
+        assert (label_propagation(n, src, dst, np.ones(n - 1), max_iter=60) == labels).all()
+
+
+def test_label_propagation_leaves_isolated_nodes_alone():
+    assert label_propagation(4, np.array([0]), np.array([1]), np.ones(1)).tolist() == [1, 1, 2, 3]
+    assert label_propagation(3, np.array([], dtype=int), np.array([], dtype=int), np.array([])).tolist() == [0, 1, 2]
@@ -0,0 +1,107 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+import tracing
+from insights import generate_insight
+
+
+class SlowChatModel(BaseChatModel):
+    """Answers after a delay chosen by which of the three insight prompts it gets"""
+
+    delays: dict
+    stats: dict = {}
+
+    @property
+    def _llm_type(self):
+        return "slow-fake"
+
+    def _delay(self, prompt):
+        for marker, seconds in self.delays.items():
+            if marker in prompt:
+                return seconds
+        return 0
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise NotImplementedError
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.stats["active"] = self.stats.get("active", 0) + 1
+        self.stats["peak"] = max(self.stats.get("peak", 0), self.stats["active"])
+        try:
+            await asyncio.sleep(self._delay(messages[-1].content))
+        finally:
+            self.stats["active"] -= 1
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="ok"))])
+
+
+def slow_model(captions=0.4, hashtags=0.3, synthesis=0.2):
+    return SlowChatModel(
+        cache=False,
+        stats={},
+        delays={"I have gathered": synthesis, "list of hashtags": hashtags, "collected captions": captions},
+    )
+
+
+def timed(model, **options):
+    started = time.perf_counter()
+    generate_insight(model, "fashion", ["a caption"], {"fashion": 1}, **options)
+    return time.perf_counter() - started
+
+
+def test_sub_analyses_run_concurrently():
+    model = slow_model()
+    elapsed = timed(model)
+    # max(0.4, 0.3) + 0.2 rather than 0.4 + 0.3 + 0.2
+    assert 0.6 <= elapsed < 0.8
+    assert model.stats["peak"] == 2
+
+
+def test_max_concurrency_caps_parallel_calls():
+    model = slow_model()
+    elapsed = timed(model, max_concurrency=1)
+    assert elapsed >= 0.9
+    assert model.stats["peak"] == 1
+
+
+def test_timeout_applies_per_call():
+    with pytest.raises(asyncio.TimeoutError):
+        timed(slow_model(captions=2.0), timeout=0.5)
+
+
+class LoopBoundChatModel(SlowChatModel):
+    """Like Gemini's gRPC client: unusable from any event loop but the first one it ran on"""
+
+    def _check_loop(self):
+        loop = self.stats.setdefault("loop", asyncio.get_running_loop())
+        if loop is not asyncio.get_running_loop():
+            raise RuntimeError("Event loop is closed")
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self._check_loop()
+        return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+
+def test_repeated_insights_share_one_event_loop():
+    model = LoopBoundChatModel(cache=False, stats={}, delays={})
+    for _ in range(3):
+        assert generate_insight(model, "fashion", ["a caption"], {"fashion": 1}) == "ok"
+
+
+def test_concurrent_insights_from_worker_threads():
+    model = LoopBoundChatModel(cache=False, stats={}, delays={})
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda i: generate_insight(model, str(i), ["a caption"], {"tag": 1}), range(8)))
+    assert results == ["ok"] * 8
+
+
+def test_insight_spans_nest_under_the_caller():
+    with tracing.trace("test") as trace:
+        generate_insight(slow_model(0, 0, 0), "fashion", ["a caption"], {"fashion": 1})
+    names = {span["name"] for span in trace.to_dict()["spans"]}
+    assert {"llm.captions", "llm.hashtags", "llm.synthesis"} <= names
@@ -0,0 +1,97 @@
+import threading
+import time
+
+from batch import run_batch_job
+from jobs import DONE, FAILED, JobQueue
+from pipeline import run_analysis_job, run_refilter_job
+from synthetic import FakeApifyClient, fake_chat_model, synthetic_items
+
+
+def wait(job, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not job.finished:
+        assert time.monotonic() < deadline, "job did not finish"
+        time.sleep(0.01)
+    return job
+
+
+def test_identical_in_flight_jobs_are_shared():
+    queue = JobQueue(max_workers=2)
+    release = threading.Event()
+    calls = []
+
+    def body(job, value):
+        calls.append(value)
+        release.wait(5)
+        return value * 2
+
+    first = queue.submit("fashion", body, 21)
+    second = queue.submit("fashion", body, 21)
+    release.set()
+
+    assert first is second
+    assert wait(first).status == DONE and first.result == 42
+    assert calls == [21]
+
+    # Once finished, the same key starts a new job
+    assert wait(queue.submit("fashion", body, 1)).result == 2
+
+
+def test_failed_job_reports_error_and_frees_its_key():
+    queue = JobQueue(max_workers=1)
+
+    def body(job):
+        job.update(stage="scraping")
+        raise RuntimeError("apify down")
+
+    job = wait(queue.submit("fashion", body))
+    assert (job.status, job.stage, job.error) == (FAILED, "failed", "apify down")
+    assert job.finished_at is not None
+    assert queue.submit("fashion", body) is not job
+
+
+def test_finished_jobs_are_pruned():
+    queue = JobQueue(max_workers=4, keep_finished=1)
+    jobs = [wait(queue.submit(str(i), lambda job: None)) for i in range(3)]
+    # Submitting while other jobs finish concurrently must not trip over half-finished ones
+    for i in range(20):
+        queue.submit(f"extra{i}", lambda job: time.sleep(0.001))
+    assert queue.get(jobs[0].id) is None
+
+
+def test_analysis_job_with_fake_backends():
+    queue = JobQueue(max_workers=1)
+    job = wait(queue.submit(
+        "fashion", run_analysis_job, "fashion", FakeApifyClient(synthetic_items(40)), fake_chat_model()
+    ))
+
+    assert job.status == DONE, job.error
+    assert len(job.partial["preview"]["url_list"]) == 40
+    assert job.partial["insight_parts"]["synthesis"] == job.result["result"]["insight"]
+    assert {span["name"] for span in job.result["trace"]["spans"]} >= {"analysis", "scrape", "insight"}
+
+
+def test_batch_job_reports_finished_hashtags():
+    queue = JobQueue(max_workers=1)
+    job = wait(queue.submit("batch", run_batch_job, ["a", "b"], FakeApifyClient(synthetic_items(20))))
+
+    assert job.status == DONE, job.error
+    assert sorted(job.partial["finished"]) == ["a", "b"]
+    assert list(job.result["results"]) == ["a", "b"]
+
+
+def test_refilter_job_reuses_the_insight_cache():
+    queue = JobQueue(max_workers=1)
+    model = fake_chat_model()
+    analysis = wait(queue.submit("fashion", run_analysis_job, "fashion", FakeApifyClient(synthetic_items(40)), model))
+    result_set = analysis.result["result_set"]
+    insight_cache = {}
+
+    first = queue.submit("refilter", run_refilter_job, result_set, model, min_likes=10, insight_cache=insight_cache)
+    assert first.wait(10) and first.status == DONE, first.error
+    assert first.partial["insight_parts"]["synthesis"] == first.result["result"]["insight"]
+    assert len(insight_cache) == 1
+
+    again = queue.submit("refilter", run_refilter_job, result_set, model, min_likes=10, insight_cache=insight_cache)
+    assert again.wait(10) and "insight_parts" not in again.partial
+    assert again.result["result"]["insight"] == first.result["result"]["insight"]
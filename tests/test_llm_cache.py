@@ -0,0 +1,83 @@
+import asyncio
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from llm_cache import PersistentLLMCache, astream_with_cache
+
+
+class CountingChatModel(BaseChatModel):
+    """Echoes the prompt and counts how often it was really called"""
+
+    temperature: float = 0
+    calls: list = []
+
+    @property
+    def _llm_type(self):
+        return "counting-fake"
+
+    @property
+    def _identifying_params(self):
+        # Real chat models put their settings into the cache key the same way
+        return {"temperature": self.temperature}
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls.append(messages[-1].content)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=f"echo: {messages[-1].content}"))])
+
+
+def model_with(cache, **fields):
+    return CountingChatModel(cache=cache, calls=[], **fields)
+
+
+def test_identical_prompts_hit_the_cache(tmp_path):
+    cache = PersistentLLMCache(str(tmp_path / "llm.sqlite3"))
+    model = model_with(cache)
+
+    assert model.invoke("hello").content == "echo: hello"
+    assert model.invoke("hello").content == "echo: hello"
+    assert model.invoke("other").content == "echo: other"
+
+    assert model.calls == ["hello", "other"]
+    assert cache.stats() == {"hits": 1, "misses": 2}
+
+
+def test_cache_key_includes_model_settings(tmp_path):
+    cache = PersistentLLMCache(str(tmp_path / "llm.sqlite3"))
+    model_with(cache).invoke("hello")
+
+    warmer = model_with(cache, temperature=0.7)
+    warmer.invoke("hello")
+    assert warmer.calls == ["hello"]
+
+
+def test_responses_persist_across_instances(tmp_path):
+    path = str(tmp_path / "llm.sqlite3")
+    model_with(PersistentLLMCache(path)).invoke("hello")
+
+    model = model_with(PersistentLLMCache(path))
+    assert model.invoke("hello").content == "echo: hello"
+    assert model.calls == []
+
+
+def test_eviction_keeps_the_cache_bounded(tmp_path):
+    cache = PersistentLLMCache(str(tmp_path / "llm.sqlite3"), max_entries=1)
+    model = model_with(cache)
+    model.invoke("first")
+    model.invoke("second")
+    model.invoke("first")
+    assert model.calls == ["first", "second", "first"]
+
+
+def test_streaming_shares_entries_with_invoke(tmp_path):
+    cache = PersistentLLMCache(str(tmp_path / "llm.sqlite3"))
+    model = model_with(cache)
+
+    async def stream(prompt):
+        return "".join([chunk.content async for chunk in astream_with_cache(model, prompt)])
+
+    assert asyncio.run(stream("hello")) == "echo: hello"
+    assert model.invoke("hello").content == "echo: hello"
+    assert asyncio.run(stream("hello")) == "echo: hello"
+    assert model.calls == ["hello"]
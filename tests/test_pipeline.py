@@ -0,0 +1,34 @@
+import tracing
+from pipeline import load_result_set
+from scrape_cache import ScrapeCache
+from synthetic import FakeApifyClient, synthetic_items
+
+
+def test_empty_scrape_is_not_cached(tmp_path):
+    cache = ScrapeCache(str(tmp_path / "cache.sqlite3"))
+    assert len(load_result_set("fashion", FakeApifyClient([]), cache)) == 0
+
+    result_set = load_result_set("fashion", FakeApifyClient(synthetic_items(20)), cache)
+    assert len(result_set) == 20
+
+
+def test_scrape_span_records_cache_state(tmp_path):
+    cache = ScrapeCache(str(tmp_path / "cache.sqlite3"))
+    client = FakeApifyClient(synthetic_items(20))
+    states = []
+    for _ in range(2):
+        with tracing.trace("test") as trace:
+            load_result_set("fashion", client, cache)
+        states += [span["attributes"]["cache"] for span in trace.to_dict()["spans"] if span["name"] == "scrape"]
+    assert states == ["miss", "fresh"]
+
+
+def test_configured_trace_logging_emits_spans(capsys, monkeypatch):
+    for attribute, value in (("handlers", []), ("level", tracing.logger.level), ("propagate", True)):
+        monkeypatch.setattr(tracing.logger, attribute, value)
+    tracing.configure_logging()
+    tracing.configure_logging()
+    with tracing.trace("test", hashtag="fashion"):
+        pass
+    lines = capsys.readouterr().err.splitlines()
+    assert len(lines) == 1 and '"name": "test"' in lines[0]
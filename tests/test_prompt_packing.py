@@ -0,0 +1,68 @@
+import asyncio
+
+from insights import _areduce_captions
+from prompt_packing import caption_fingerprint, chunk_by_tokens, count_tokens, dedup_captions, format_hashtag_counts
+from synthetic import fake_chat_model
+
+
+def test_reposts_collapse_to_the_first_copy():
+    captions = [
+        "Sunset at the beach 🌅 #travel",
+        "sunset at the BEACH!! #vacation https://example.com/p/1",
+        "  Sunset at the beach  ",
+        "Morning coffee",
+    ]
+    assert dedup_captions(captions) == ["Sunset at the beach 🌅 #travel", "Morning coffee"]
+
+
+def test_numbers_keep_captions_apart():
+    captions = ["Top 5 beaches", "Top 10 beaches", "Sale: $20 off", "Sale: $30 off"]
+    assert dedup_captions(captions) == captions
+    assert dedup_captions([f"cap {i}" for i in range(10)]) == [f"cap {i}" for i in range(10)]
+
+
+def test_emoji_only_captions_dedup_on_their_text():
+    assert caption_fingerprint("🔥🔥 #fire") == ""
+    assert dedup_captions(["🔥🔥", "🔥🔥", "🌊"]) == ["🔥🔥", "🌊"]
+
+
+def test_chunks_respect_the_budget_and_keep_order():
+    texts = [f"caption number {i} " + "word " * (i % 7) for i in range(40)]
+    chunks = chunk_by_tokens(texts, 40)
+
+    assert "\n".join(chunks).split("\n") == texts
+    assert all(count_tokens(chunk) <= 40 for chunk in chunks)
+
+
+def test_oversized_text_gets_its_own_chunk():
+    long = "word " * 200
+    assert chunk_by_tokens(["short", long, "short"], 20) == ["short", long, "short"]
+
+
+def test_hashtag_counts_stop_at_the_budget():
+    counts = {f"tag{i}": 100 - i for i in range(100)}
+    text = format_hashtag_counts(counts, 30)
+
+    assert text.startswith("tag0: 100\ntag1: 99")
+    assert count_tokens(text) <= 30
+    assert format_hashtag_counts(counts, 0) == ""
+
+
+def test_captions_over_budget_are_map_reduced():
+    model = fake_chat_model()
+    captions = [f"caption {i} " + "detail " * 20 for i in range(60)]
+    budget = 200
+    assert count_tokens("\n".join(captions)) > budget
+
+    text = asyncio.run(_areduce_captions(model, "fashion", captions, budget, asyncio.Semaphore(4), timeout=10))
+
+    # Each map call answers with one short summary line per chunk
+    assert count_tokens(text) <= budget
+    assert len(text.splitlines()) == len(chunk_by_tokens(captions, budget)) > 1
+    assert all(line.startswith("- summary of") for line in text.splitlines())
+
+
+def test_captions_within_budget_are_sent_as_is():
+    captions = ["one", "two"]
+    text = asyncio.run(_areduce_captions(fake_chat_model(), "fashion", captions, 100, asyncio.Semaphore(1), 10))
+    assert text == "one\ntwo"
@@ -0,0 +1,116 @@
+import threading
+import time
+
+from pipeline import build_payload, load_result_set
+from scrape_cache import ScrapeCache, cache_from_env, make_cache_key
+from synthetic import synthetic_items
+
+
+def age(cache, key, seconds):
+    """Pretend an entry was written `seconds` ago"""
+    with cache._connect() as conn:
+        conn.execute("UPDATE entries SET created_at = created_at - ? WHERE key = ?", (seconds, key))
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_fresh_stale_and_expired(tmp_path):
+    cache = ScrapeCache(str(tmp_path / "cache.sqlite3"), ttl=60, stale_ttl=60)
+    cache.set("k", {"posts": [1]})
+    assert cache.get("k") == ({"posts": [1]}, "fresh")
+
+    age(cache, "k", 90)
+    assert cache.get("k") == ({"posts": [1]}, "stale")
+
+    age(cache, "k", 60)
+    assert cache.get("k") == (None, "miss")
+    assert cache.get("k") == (None, "miss")
+
+
+def test_lru_eviction_by_entries_and_bytes(tmp_path):
+    cache = ScrapeCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    time.sleep(0.01)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b")[1] == "miss"
+    assert cache.get("a")[1] == cache.get("c")[1] == "fresh"
+
+    cache = ScrapeCache(str(tmp_path / "bytes.sqlite3"), max_bytes=1)
+    cache.set("a", "x" * 1000)
+    assert cache.get("a")[1] == "miss"
+
+
+def test_get_or_fetch_serves_stale_and_refreshes_once(tmp_path):
+    cache = ScrapeCache(str(tmp_path / "cache.sqlite3"), ttl=60, stale_ttl=3600)
+    cache.set("k", "old")
+    age(cache, "k", 120)
+
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return "new"
+
+    assert cache.get_or_fetch("k", fetch) == ("old", "stale")
+    assert cache.get_or_fetch("k", fetch) == ("old", "stale")
+    release.set()
+    wait_for(lambda: cache.get("k") == ("new", "fresh"))
+    assert len(calls) == 1
+
+
+def test_get_or_fetch_miss_stores_result(tmp_path):
+    cache = ScrapeCache(str(tmp_path / "cache.sqlite3"))
+    assert cache.get_or_fetch("k", lambda: [1, 2]) == ([1, 2], "miss")
+    assert cache.get_or_fetch("k", lambda: [3]) == ([1, 2], "fresh")
+
+
+def test_cache_from_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCRAPE_CACHE_PATH", str(tmp_path / "env.sqlite3"))
+    monkeypatch.setenv("SCRAPE_CACHE_TTL", "5")
+    monkeypatch.setenv("SCRAPE_CACHE_MAX_BYTES", "1024")
+    cache = cache_from_env()
+    assert (cache.ttl, cache.max_bytes) == (5, 1024)
+
+
+def test_cache_key_ignores_hashtag_spelling():
+    payloads = [build_payload(term) for term in ("Fashion", "#fashion", " fashion ")]
+    keys = {make_cache_key(payload["search"], payload) for payload in payloads}
+    assert len(keys) == 1
+
+
+def test_unworthy_results_are_not_cached(tmp_path):
+    cache = ScrapeCache(str(tmp_path / "cache.sqlite3"))
+    empty = {"posts": [], "locations": []}
+    assert cache.get_or_fetch("k", lambda: empty, worth_caching=lambda value: value["posts"]) == (empty, "miss")
+    assert cache.get("k") == (None, "miss")
+
+
+def test_cache_in_front_of_the_apify_http_api(tmp_path, apify_stub, apify_client):
+    run = {"data": {"id": "run1", "status": "SUCCEEDED", "defaultDatasetId": "ds1"}}
+    apify_stub.routes[("POST", "/acts/apify~instagram-scraper/runs")] = [(201, run, {})]
+    apify_stub.routes[("GET", "/datasets/ds1/items")] = [(200, synthetic_items(10, posts_per_item=5), {})]
+    cache = ScrapeCache(str(tmp_path / "cache.sqlite3"), ttl=60, stale_ttl=3600)
+
+    def runs_started():
+        return sum(request["method"] == "POST" for request in apify_stub.requests)
+
+    assert len(load_result_set("fashion", apify_client, cache)) == 10
+    requests_made = len(apify_stub.requests)
+    assert len(load_result_set("fashion", apify_client, cache)) == 10
+    assert len(apify_stub.requests) == requests_made
+
+    key = make_cache_key("fashion", build_payload("fashion"), namespace="posts")
+    age(cache, key, 120)
+    assert len(load_result_set("fashion", apify_client, cache)) == 10
+    assert len(load_result_set("fashion", apify_client, cache)) == 10
+    wait_for(lambda: cache.get(key)[1] == "fresh")
+    assert runs_started() == 2
@@ -0,0 +1,86 @@
+import time
+
+from pipeline import load_result_set, run_analysis, track_hashtag
+from result_set import build_post_frame
+from scrape_cache import ScrapeCache
+from synthetic import FakeApifyClient
+from trend_store import TrendStore
+
+
+class RecordingClient(FakeApifyClient):
+    def __init__(self, items):
+        super().__init__(items)
+        self.payloads = []
+
+    def scrape_items(self, payload, **options):
+        self.payloads.append(payload)
+        return super().scrape_items(payload, **options)
+
+
+def post(i, likes, tags):
+    return {"url": f"https://www.instagram.com/p/{i}/", "caption": f"post {i}", "hashtags": tags, "likes": likes}
+
+
+def test_delta_snapshots_carry_forward_earlier_posts(tmp_path):
+    store = TrendStore(str(tmp_path / "trends.sqlite3"))
+    full = [post(i, 10, ["a", "b"]) for i in range(50)]
+    store.ingest("Fashion", build_post_frame(full), taken_at=1000)
+
+    delta = [post(50, 5, ["a"]), post(51, 7, ["c"])]
+    snapshot_id, new_posts = store.ingest("#fashion", build_post_frame(delta), taken_at=2000, delta=True)
+
+    assert new_posts == 2
+    assert store.history("fashion")[-1]["posts"] == 52
+    changes = store.changes_since_last("fashion")
+    moves = {row["hashtag"]: row["change"] for row in changes["hashtag_changes"]}
+    assert moves == {"a": 1, "c": 1, "b": 0}
+    assert [row["url"] for row in changes["new_posts"]] == [delta[1]["url"], delta[0]["url"]]
+    assert changes["like_gains"] == []
+
+
+def test_empty_delta_is_a_no_op(tmp_path):
+    store = TrendStore(str(tmp_path / "trends.sqlite3"))
+    store.ingest("fashion", build_post_frame([post(i, i, ["a"]) for i in range(5)]), taken_at=1000)
+    assert store.ingest("fashion", build_post_frame([]), taken_at=2000, delta=True) == (None, 0)
+
+
+def test_full_snapshots_report_like_gains(tmp_path):
+    store = TrendStore(str(tmp_path / "trends.sqlite3"))
+    store.ingest("fashion", build_post_frame([post(1, 10, ["a"]), post(2, 10, ["a"])]), taken_at=1000)
+    store.ingest("fashion", build_post_frame([post(1, 25, ["a"]), post(2, 10, ["a"])]), taken_at=2000)
+
+    gains = store.changes_since_last("fashion")["like_gains"]
+    assert gains == [{"url": post(1, 0, [])["url"], "likes": 25, "gain": 15}]
+
+
+def test_older_scrapes_are_not_recorded(tmp_path):
+    store = TrendStore(str(tmp_path / "trends.sqlite3"))
+    store.ingest("fashion", build_post_frame([post(1, 10, ["a"])]), taken_at=2000)
+    assert store.ingest("fashion", build_post_frame([post(2, 10, ["a"])]), taken_at=1000) == (None, 0)
+    assert store.last_snapshot_time("fashion") == 2000
+
+
+def test_cache_replays_keep_their_scrape_time(tmp_path):
+    cache = ScrapeCache(str(tmp_path / "cache.sqlite3"))
+    store = TrendStore(str(tmp_path / "trends.sqlite3"))
+    items = [{"topPosts": [{**post(1, 10, ["a"]), "likesCount": 10}]}]
+
+    scraped_at = load_result_set("fashion", FakeApifyClient(items), cache).scraped_at
+    time.sleep(0.01)
+    run_analysis("fashion", client=FakeApifyClient([]), cache=cache, store=store, insight=False)
+
+    assert store.last_snapshot_time("fashion") == scraped_at
+
+
+def test_track_hashtag_scrapes_deltas(tmp_path):
+    store = TrendStore(str(tmp_path / "trends.sqlite3"))
+    first = FakeApifyClient([{"topPosts": [{**post(1, 10, ["a"]), "likesCount": 10}]}])
+    track_hashtag("fashion", first, store)
+
+    second = RecordingClient([{"topPosts": [{**post(2, 3, ["b"]), "likesCount": 3}]}])
+    tracked = track_hashtag("fashion", second, store)
+
+    assert "onlyPostsNewerThan" in second.payloads[0]
+    assert tracked["new_posts"] == 1
+    assert store.history("fashion")[-1]["posts"] == 2
+    assert {row["hashtag"]: row["change"] for row in tracked["changes"]["hashtag_changes"]} == {"b": 1, "a": 0}
@@ -0,0 +1,190 @@
+"""Lightweight span tracing for the analysis pipeline.
+
+A trace is opened around one analysis and every stage inside it opens a
+child span:
+
+    with tracing.trace("analysis", hashtag="fashion") as t:
+        with tracing.span("scrape"):
+            ...
+            tracing.add(items=len(items))
+    t.to_dict()
+
+The current span lives in a context variable, so spans nest correctly across
+asyncio tasks and LangChain's executor calls; code running outside any trace
+(e.g. a cache refresh thread) pays nothing. Finished traces are logged as one
+JSON line per span in an OpenTelemetry-like shape, to the `tracing` logger
+(see configure_logging) and, when TRACE_LOG_PATH is set, appended to that
+file.
+"""
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("current_span", default=None)
+_log_lock = threading.Lock()
+
+
+class Span:
+    def __init__(self, trace, name, parent_id=None, attributes=None):
+        self.trace = trace
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.status = "OK"
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self.duration = None
+
+    def set(self, **attributes):
+        with self.trace.lock:
+            self.attributes.update(attributes)
+
+    def add(self, **counters):
+        with self.trace.lock:
+            for key, value in counters.items():
+                self.attributes[key] = self.attributes.get(key, 0) + value
+
+    def end(self, error=None):
+        self.duration = time.perf_counter() - self._started
+        if error is not None:
+            self.status = "ERROR"
+            self.attributes["error"] = f"{error.__class__.__name__}: {error}"
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "start_time_unix_nano": int(self.start_time * 1e9),
+            "end_time_unix_nano": int((self.start_time + (self.duration or 0)) * 1e9),
+            "duration_ms": round((self.duration or 0) * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    """All spans of one traced operation, in the order they started"""
+
+    def __init__(self):
+        self.trace_id = secrets.token_hex(16)
+        self.lock = threading.Lock()
+        self.spans = []
+
+    def _start(self, name, parent, attributes):
+        span = Span(self, name, parent.span_id if parent else None, attributes)
+        with self.lock:
+            self.spans.append(span)
+        return span
+
+    def to_dict(self):
+        with self.lock:
+            return {"trace_id": self.trace_id, "spans": [span.to_dict() for span in self.spans]}
+
+
+def summarize(trace_dict):
+    """One row per span name with call count, total duration and summed numeric attributes"""
+    totals = {}
+    for span in trace_dict["spans"]:
+        row = totals.setdefault(span["name"], {"stage": span["name"], "calls": 0, "duration_ms": 0.0})
+        row["calls"] += 1
+        row["duration_ms"] = round(row["duration_ms"] + span["duration_ms"], 3)
+        for key, value in span["attributes"].items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                row[key] = round(row.get(key, 0) + value, 6)
+    return list(totals.values())
+
+
+@contextmanager
+def _activate(span):
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.end(e)
+        raise
+    else:
+        span.end()
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def trace(name, **attributes):
+    """Open a new trace with a root span; it is logged once the block exits"""
+    current = Trace()
+    try:
+        with _activate(current._start(name, None, attributes)):
+            yield current
+    finally:
+        export(current)
+
+
+@contextmanager
+def span(name, **attributes):
+    """Child span of the current span; a no-op outside of a trace"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    with _activate(parent.trace._start(name, parent, attributes)) as child:
+        yield child
+
+
+def set_attributes(**attributes):
+    """Set attributes on the current span, if any"""
+    current = _current.get()
+    if current is not None:
+        current.set(**attributes)
+
+
+def add(**counters):
+    """Increment numeric attributes on the current span, if any"""
+    current = _current.get()
+    if current is not None:
+        current.add(**counters)
+
+
+def configure_logging(level=None):
+    """Print finished spans to stderr at TRACE_LOG_LEVEL (default INFO; WARNING silences them).
+
+    Entry points call this once; nothing else configures logging, so without
+    it the root logger's WARNING level would drop every span. Safe to call
+    again, e.g. on every Streamlit rerun.
+    """
+    logger.setLevel((level or os.getenv("TRACE_LOG_LEVEL", "INFO")).upper())
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.propagate = False
+
+
+def record_http(info):
+    """ApifyClient hook: count requests, bytes, retries and HTTP time on the current span"""
+    add(
+        http_requests=1,
+        http_bytes=info["bytes"],
+        http_seconds=round(info["elapsed"], 6),
+        http_retries=1 if info["attempt"] else 0,
+        http_errors=1 if info["error"] or (info["status"] or 0) >= 400 else 0,
+    )
+
+
+def export(finished):
+    lines = [json.dumps(span, default=str) for span in finished.to_dict()["spans"]]
+    for line in lines:
+        logger.info(line)
+    path = os.getenv("TRACE_LOG_PATH")
+    if path:
+        with _log_lock, open(path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
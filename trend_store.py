@@ -0,0 +1,271 @@
+"""Local time-series store of hashtag snapshots.
+
+Usage (e.g. hourly from cron):
+
+    python cli.py track fashion travel
+    python cli.py changes fashion
+"""
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+import tracing
+from extraction import normalize_hashtag
+from result_set import content_hash
+
+DEFAULT_STORE_PATH = os.path.join(".cache", "trends.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    hashtag TEXT NOT NULL,
+    taken_at REAL NOT NULL,
+    posts INTEGER NOT NULL,
+    new_posts INTEGER NOT NULL,
+    content_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_hashtag ON snapshots (hashtag, taken_at);
+
+CREATE TABLE IF NOT EXISTS posts (
+    hashtag TEXT NOT NULL,
+    url TEXT NOT NULL,
+    first_seen INTEGER NOT NULL REFERENCES snapshots (id),
+    caption TEXT,
+    location TEXT,
+    hashtags TEXT,
+    PRIMARY KEY (hashtag, url)
+);
+
+CREATE TABLE IF NOT EXISTS post_likes (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id),
+    url TEXT NOT NULL,
+    likes INTEGER NOT NULL,
+    PRIMARY KEY (snapshot_id, url)
+);
+
+CREATE TABLE IF NOT EXISTS hashtag_counts (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id),
+    tag TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (snapshot_id, tag)
+);
+"""
+
+
+class TrendStore:
+    """SQLite time series of scrape snapshots keyed by hashtag and post URL.
+
+    Each ingest records a snapshot with per-post like counts and hashtag
+    frequencies, but only stores the full post row (caption, tags, location)
+    the first time a URL is seen for that hashtag. Re-ingesting an identical
+    scrape (e.g. a cache replay) is a no-op, as is ingesting one older than
+    the latest snapshot.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def ingest(self, hashtag, posts, taken_at=None, delta=False):
+        """Record a snapshot from a post table (see result_set.build_post_frame).
+
+        `taken_at` is when the posts were scraped (default: now). With
+        `delta=True` the posts come from a scrape limited to newer posts, and
+        every post of the latest snapshot missing from it is carried forward
+        with its last known likes, so each snapshot covers the same ground and
+        consecutive snapshots can be compared.
+
+        Returns (snapshot_id, new_post_count), or (None, 0) if the posts are
+        identical to, or older than, the latest snapshot for this hashtag.
+        """
+        with tracing.span("store.ingest", delta=delta):
+            snapshot_id, new_posts = self._ingest(hashtag, posts, taken_at, delta)
+            tracing.set_attributes(snapshot_id=snapshot_id, new_posts=new_posts)
+        return snapshot_id, new_posts
+
+    def _carry_forward(self, conn, hashtag, snapshot_id, posts):
+        """Add the posts of a snapshot that a delta scrape didn't return again"""
+        rows = conn.execute(
+            """
+            SELECT post_likes.url, post_likes.likes, posts.caption, posts.location, posts.hashtags
+            FROM post_likes JOIN posts ON posts.hashtag = ? AND posts.url = post_likes.url
+            WHERE post_likes.snapshot_id = ?
+            """,
+            (hashtag, snapshot_id),
+        ).fetchall()
+        previous = pd.DataFrame(rows, columns=["url", "likes", "caption", "location", "hashtags"])
+        previous["hashtags"] = [json.loads(tags) if tags else [] for tags in previous["hashtags"]]
+        previous = previous[~previous["url"].isin(posts["url"])]
+        return pd.concat([posts[previous.columns], previous], ignore_index=True)
+
+    def _ingest(self, hashtag, posts, taken_at=None, delta=False):
+        hashtag = normalize_hashtag(hashtag)
+        posts = posts[posts["url"] != ""].drop_duplicates("url")
+        taken_at = taken_at or time.time()
+
+        with self._connect() as conn:
+            latest = conn.execute(
+                "SELECT id, taken_at, content_hash FROM snapshots WHERE hashtag = ? ORDER BY id DESC LIMIT 1",
+                (hashtag,),
+            ).fetchone()
+            if latest is not None and taken_at <= latest[1]:
+                # e.g. a cached scrape replayed after a newer snapshot was tracked
+                return None, 0
+            if delta and latest is not None:
+                posts = self._carry_forward(conn, hashtag, latest[0], posts)
+
+            urls = posts["url"].tolist()
+            likes = posts["likes"].tolist()
+            # Hash in URL order: carried-forward posts don't come back in scrape order
+            ordered = posts.sort_values("url", kind="mergesort")
+            digest = content_hash(ordered["url"], ordered["likes"])
+            if latest is not None and latest[2] == digest:
+                return None, 0
+
+            snapshot_id = conn.execute(
+                "INSERT INTO snapshots (hashtag, taken_at, posts, new_posts, content_hash) VALUES (?, ?, ?, 0, ?)",
+                (hashtag, taken_at, len(urls), digest),
+            ).lastrowid
+
+            # Look up which incoming URLs we already know through the primary key index,
+            # so the cost depends on this scrape's size rather than the stored history.
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS incoming (url TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM incoming")
+            conn.executemany("INSERT INTO incoming (url) VALUES (?)", ((url,) for url in urls))
+            known = {row[0] for row in conn.execute(
+                "SELECT incoming.url FROM incoming JOIN posts ON posts.hashtag = ? AND posts.url = incoming.url",
+                (hashtag,),
+            )}
+
+            new_posts = posts[~posts["url"].isin(known)]
+            conn.executemany(
+                "INSERT INTO posts (hashtag, url, first_seen, caption, location, hashtags) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        hashtag, row.url, snapshot_id, row.caption,
+                        row.location if isinstance(row.location, str) else None,
+                        json.dumps(list(row.hashtags)),
+                    )
+                    for row in new_posts.itertuples(index=False)
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO post_likes (snapshot_id, url, likes) VALUES (?, ?, ?)",
+                ((snapshot_id, url, int(count)) for url, count in zip(urls, likes)),
+            )
+
+            tag_counts = posts["hashtags"].explode().dropna().value_counts()
+            conn.executemany(
+                "INSERT INTO hashtag_counts (snapshot_id, tag, count) VALUES (?, ?, ?)",
+                ((snapshot_id, tag, int(count)) for tag, count in tag_counts.items()),
+            )
+            conn.execute("UPDATE snapshots SET new_posts = ? WHERE id = ?", (len(new_posts), snapshot_id))
+
+        return snapshot_id, len(new_posts)
+
+    def last_snapshot_time(self, hashtag):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MAX(taken_at) FROM snapshots WHERE hashtag = ?", (normalize_hashtag(hashtag),)
+            ).fetchone()
+        return row[0]
+
+    def history(self, hashtag):
+        """All snapshots for a hashtag, oldest first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, taken_at, posts, new_posts FROM snapshots WHERE hashtag = ? ORDER BY id",
+                (normalize_hashtag(hashtag),),
+            ).fetchall()
+        return [dict(zip(("id", "taken_at", "posts", "new_posts"), row)) for row in rows]
+
+    def changes_since_last(self, hashtag, limit=10):
+        """Compare the two most recent snapshots of a hashtag.
+
+        Returns None until there are two snapshots, otherwise the number of
+        new posts with the most liked of them, the hashtags whose frequency
+        moved most and the posts that gained the most likes between them.
+        Posts carried forward by a delta snapshot keep their likes, so only
+        posts scraped again show up as gains.
+        """
+        hashtag = normalize_hashtag(hashtag)
+        with self._connect() as conn:
+            snapshots = conn.execute(
+                "SELECT id, taken_at, new_posts FROM snapshots WHERE hashtag = ? ORDER BY id DESC LIMIT 2",
+                (hashtag,),
+            ).fetchall()
+            if len(snapshots) < 2:
+                return None
+            (latest, latest_at, new_post_count), (previous, previous_at, _) = snapshots
+
+            new_posts = conn.execute(
+                """
+                SELECT posts.url, posts.caption, post_likes.likes
+                FROM posts JOIN post_likes ON post_likes.snapshot_id = ? AND post_likes.url = posts.url
+                WHERE posts.hashtag = ? AND posts.first_seen = ?
+                ORDER BY post_likes.likes DESC
+                LIMIT ?
+                """,
+                (latest, hashtag, latest, limit),
+            ).fetchall()
+
+            hashtag_moves = conn.execute(
+                """
+                SELECT tag,
+                       SUM(CASE WHEN snapshot_id = :latest THEN count ELSE 0 END) AS latest_count,
+                       SUM(CASE WHEN snapshot_id = :previous THEN count ELSE 0 END) AS previous_count
+                FROM hashtag_counts
+                WHERE snapshot_id IN (:latest, :previous)
+                GROUP BY tag
+                ORDER BY ABS(latest_count - previous_count) DESC, latest_count DESC
+                LIMIT :limit
+                """,
+                {"latest": latest, "previous": previous, "limit": limit},
+            ).fetchall()
+
+            like_gains = conn.execute(
+                """
+                SELECT cur.url, cur.likes, cur.likes - prev.likes AS gain
+                FROM post_likes AS cur
+                JOIN post_likes AS prev ON prev.snapshot_id = ? AND prev.url = cur.url
+                WHERE cur.snapshot_id = ? AND cur.likes != prev.likes
+                ORDER BY gain DESC
+                LIMIT ?
+                """,
+                (previous, latest, limit),
+            ).fetchall()
+
+        return {
+            "hashtag": hashtag,
+            "latest_at": latest_at,
+            "previous_at": previous_at,
+            "new_post_count": new_post_count,
+            "new_posts": [{"url": url, "caption": caption, "likes": likes} for url, caption, likes in new_posts],
+            "hashtag_changes": [
+                {"hashtag": tag, "count": count, "previous": previous_count, "change": count - previous_count}
+                for tag, count, previous_count in hashtag_moves
+            ],
+            "like_gains": [{"url": url, "likes": likes, "gain": gain} for url, likes, gain in like_gains],
+        }
+
+
+def store_from_env():
+    return TrendStore(os.getenv("TREND_STORE_PATH", DEFAULT_STORE_PATH))
+
@@ -0,0 +1,106 @@
+import json
+import os
+import sqlite3
+import time
+import zlib
+from contextlib import contextmanager
+
+
+class TTLStore:
+    """SQLite key-value store of JSON values with a TTL, a stale window and LRU eviction.
+
+    Entries younger than `ttl` seconds are fresh, entries older than that but
+    younger than `ttl + stale_ttl` are stale, and anything older is a miss.
+    Once there are more than `max_entries` entries or `max_bytes` of
+    compressed values, the least recently read ones are evicted.
+    """
+
+    def __init__(self, path, ttl=3600, stale_ttl=0, max_entries=500, max_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        """Return (value, state) where state is "fresh", "stale" or "miss"."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None, "miss"
+
+            value, created_at = row
+            age = now - created_at
+            if age > self.ttl + self.stale_ttl:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None, "miss"
+
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+
+        state = "fresh" if age <= self.ttl else "stale"
+        return json.loads(zlib.decompress(value)), state
+
+    def set(self, key, value):
+        blob = zlib.compress(json.dumps(value).encode("utf-8"))
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        # Drop anything past the stale window first, then least recently used
+        # entries until both the entry count and byte budget are respected.
+        conn.execute(
+            "DELETE FROM entries WHERE created_at < ?",
+            (now - self.ttl - self.stale_ttl,),
+        )
+        count, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        rows = conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC").fetchall()
+        victims = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries")